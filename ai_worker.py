@@ -0,0 +1,69 @@
+"""在后台线程中运行 AI 搜索，界面循环无需等待
+
+pygame 主循环调用 start() 提交搜索，之后每帧调用 poll() 查看结果，期间可以
+继续处理事件和重绘；cancel() 会通知搜索尽快结束并丢弃结果。
+
+开启 ponder 后，AI 落子后可以调用 ponder() 在人类思考期间继续搜索，
+下一次 start() 会先停止后台思考，再从已经搜索过的子树继续。
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AIWorker:
+    def __init__(self, ai, ponder=False):
+        self.ai = ai
+        self.ponder_enabled = ponder
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.ponder_future = None
+
+    @property
+    def busy(self):
+        return self.future is not None
+
+    @property
+    def active(self):
+        """后台线程是否正在搜索（包括利用对手时间的思考）"""
+        return self.future is not None or self.ponder_future is not None
+
+    def start(self, game_state):
+        """在后台开始为 game_state 搜索落子"""
+        self.stop_pondering()
+        self.ai.stop_event.clear()
+        self.future = self.executor.submit(self.ai.make_move, game_state)
+
+    def poll(self):
+        """搜索完成时返回 (row, col)，否则返回 None"""
+        if self.future is None or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        return future.result()
+
+    def ponder(self, game_state):
+        """轮到对手时在后台继续搜索 game_state"""
+        if not self.ponder_enabled:
+            return
+        self.stop_pondering()
+        self.ai.stop_event.clear()
+        self.ponder_future = self.executor.submit(self.ai.ponder, game_state)
+
+    def _stop(self, future):
+        if not future.cancel():
+            self.ai.stop_event.set()
+            future.exception()  # 等待搜索线程退出
+
+    def stop_pondering(self):
+        if self.ponder_future is not None:
+            self._stop(self.ponder_future)
+            self.ponder_future = None
+
+    def cancel(self):
+        """中止正在进行的搜索（包括后台思考）并丢弃结果"""
+        self.stop_pondering()
+        if self.future is not None:
+            self._stop(self.future)
+            self.future = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=True)
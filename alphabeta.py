@@ -0,0 +1,242 @@
+"""迭代加深的 negamax / alpha-beta 搜索引擎
+
+每步从深度 1 开始逐层加深，直到时间用完、达到 max_depth、胜负已经算清或
+stop_event 被置位，返回最后一层完整搜索选出的落子；只有一步可走时直接返回。
+设置了 progress 回调时每完成一层汇报一次（主要变例取自置换表）。
+- 置换表以对称归一化后的局面哈希为键。哈希包含场上棋子的落子顺序，棋子消失
+  之后的局面也能区分；记录搜索深度、分数类型、分数和最佳落子（归一化坐标），
+  跨回合保留，新的一局开始时清空
+- 落子排序：置换表中的最佳落子、阻止对手直接获胜的空位、历史启发分数，最后
+  按经过该格子的连线数（中心、角优先）
+- 棋子消失会让局面循环出现，搜索路径上重复出现的局面（含对称等价的局面）按和棋计
+- 叶节点评估：只有一方棋子的连线按棋子数加权求和；行棋方落子时将要消失的
+  那枚棋子不计入
+
+    python arena.py alphabeta:timeout=0.2 mcts --games 50
+"""
+import math
+import time
+
+from engines import Engine
+from game_rules import BitState, canonical_key, cells_of, winning_cells
+
+WIN_SCORE = 1_000_000             # 获胜的分数，再减去步数以偏好更快的胜利
+MATE_BOUND = WIN_SCORE - 10_000   # 绝对值超过它的分数表示胜负已定
+EXACT, LOWER, UPPER = 0, 1, 2     # 置换表中分数的类型：精确值、下界、上界
+CHECK_INTERVAL = 256              # 每搜索这么多节点检查一次时间和 stop_event
+PV_LENGTH = 8                     # 汇报的主要变例最多几步
+
+
+class _Abort(Exception):
+    """时间用完或被中止，放弃当前这一层搜索"""
+
+
+class AlphaBeta(Engine):
+    def __init__(self, timeout=1, max_depth=64, table_size=1 << 20, rules=None, progress=None):
+        super().__init__(rules, progress)
+        self.timeout = timeout
+        self.max_depth = max_depth
+        self.table_size = table_size   # 置换表超过这么多条目时在下一步开始前清空
+        self.table = {}                # 归一化局面哈希 -> (深度, 分数类型, 分数, 最佳落子)
+        self.history = [[0] * self.rules.cells for _ in range(2)]  # 各方在各格子的历史启发分数
+        self.weights = [0] + [4 ** k for k in range(self.rules.win_length)]  # 连线上 k 子的分值
+        self.order = [-len(lines) for lines in self.rules.lines_through]  # 静态排序键
+        self.last_depth = 0            # 上一次 make_move 完成的搜索深度
+        self.nodes = 0
+        self.deadline = math.inf
+        self.path = set()              # 当前搜索路径上的局面
+        self.root_move = None          # 当前这一层搜索中根节点目前最好的落子
+        self.depth_limited = False     # 本层是否有分支因深度限制而停止
+
+    def reset(self):
+        self.table = {}
+        self.history = [[0] * self.rules.cells for _ in range(2)]
+
+    def make_move(self, game_state):
+        start_time = time.perf_counter()
+        state = BitState.from_game_state(game_state, self.rules)
+        cell, _ = self.choose_move(state, start_time + self.timeout)
+        self.last_iterations = self.nodes
+        return divmod(cell, self.rules.size)
+
+    def ponder(self, game_state):
+        """对手思考期间从 game_state 继续加深搜索，结果留在置换表中"""
+        state = BitState.from_game_state(game_state, self.rules)
+        if state.winner() is not None or not state.empty():
+            return
+        self.search(state, math.inf)
+
+    def choose_move(self, state, deadline):
+        """返回 (落子格子, 分数)；deadline 取自 time.perf_counter()"""
+        self.nodes = 0
+        self.last_depth = 0
+        win = winning_cells(state, state.to_move)
+        if win:
+            return cells_of(win)[0], WIN_SCORE - 1
+        legal = cells_of(state.empty())
+        if len(legal) == 1:
+            return legal[0], 0
+        if len(self.table) > self.table_size:
+            self.table = {}
+        for scores in self.history:
+            scores[:] = [v >> 1 for v in scores]  # 逐步淡化之前回合的历史启发
+        return self.search(state, deadline)
+
+    def search(self, state, deadline):
+        """迭代加深搜索，返回 (最佳落子, 分数)"""
+        self.deadline = deadline
+        start_time = time.perf_counter()
+        best, best_score = None, 0
+        for depth in range(1, self.max_depth + 1):
+            self.depth_limited = False
+            self.path = set()
+            self.root_move = None
+            try:
+                # 中止时局面停在搜索中途，所以每一层都从副本开始
+                score = self.negamax(state.copy(), depth, -math.inf, math.inf, 0)
+            except _Abort:
+                if best is None:
+                    best = self.root_move  # 第一层都没搜完时，用已经搜过的落子中最好的
+                break
+            best, best_score = self.root_move, score
+            self.last_depth = depth
+            if self.progress is not None:
+                pv = self.principal_variation(state)
+                self.progress(pv[0], pv, self.nodes, time.perf_counter() - start_time)
+            if abs(score) > MATE_BOUND or not self.depth_limited:
+                break  # 胜负已定，或者所有分支都已搜到底，再加深也不会变
+        if best is None:
+            best = self.ordered_moves(state, state.empty(), -1)[0]
+        return best, best_score
+
+    def negamax(self, state, depth, alpha, beta, ply):
+        """以行棋方视角返回局面分数；ply 为距根节点的步数"""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0 and (time.perf_counter() > self.deadline
+                                                 or self.stop_event.is_set()):
+            raise _Abort()
+        empty = state.empty()
+        if not empty:
+            return 0  # 棋子不消失时棋盘下满，和棋
+        key, sym = canonical_key(state)
+        if ply and key in self.path:
+            return 0  # 局面循环，按和棋计
+
+        rules = self.rules
+        alpha_orig = alpha
+        tt_move = -1
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, flag, score, move = entry
+            tt_move = rules.inverse_symmetries[sym][move]
+            if entry_depth >= depth and ply:
+                score = _from_table(score, ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        player = state.to_move
+        win = winning_cells(state, player)
+        if win:
+            move = cells_of(win)[0]
+            if not ply:
+                self.root_move = move
+            score = WIN_SCORE - ply - 1
+            self.table[key] = (depth, EXACT, _to_table(score, ply), rules.symmetries[sym][move])
+            return score
+        if depth == 0:
+            self.depth_limited = True
+            return self.evaluate(state)
+
+        self.path.add(key)
+        best_score, best_move = -math.inf, -1
+        for cell in self.ordered_moves(state, empty, tt_move):
+            state.apply(cell)
+            score = -self.negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            state.undo()
+            if score > best_score:
+                best_score, best_move = score, cell
+                if not ply:
+                    self.root_move = cell
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.history[player][cell] += depth * depth
+                break
+        self.path.discard(key)
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, flag, _to_table(best_score, ply), rules.symmetries[sym][best_move])
+        return best_score
+
+    def principal_variation(self, state, max_length=PV_LENGTH):
+        """沿置换表中的最佳落子走下去得到的落子序列 [(row, col), ...]"""
+        rules = self.rules
+        state = state.copy()
+        pv = []
+        seen = set()
+        while len(pv) < max_length:
+            key, sym = canonical_key(state)
+            entry = self.table.get(key)
+            if entry is None or key in seen:
+                break
+            seen.add(key)
+            cell = rules.inverse_symmetries[sym][entry[3]]
+            pv.append(divmod(cell, rules.size))
+            state.play(cell)
+            if state.winner() is not None or not state.empty():
+                break
+        return pv
+
+    def ordered_moves(self, state, empty, tt_move):
+        """置换表落子、阻止对手直接获胜的空位、历史启发分数高的、经过连线多的依次在前"""
+        blocks = winning_cells(state, state.to_move ^ 1)
+        history = self.history[state.to_move]
+        order = self.order
+        return sorted(cells_of(empty),
+                      key=lambda c: (c != tt_move, not blocks >> c & 1, -history[c], order[c]))
+
+    def evaluate(self, state):
+        """行棋方视角的静态评估：只有一方棋子的连线按棋子数加权，双方相减"""
+        rules = self.rules
+        weights = self.weights
+        popcount = rules.popcount
+        vanishing = state.vanishing()
+        mine = state.mask(state.to_move) & ~vanishing
+        theirs = state.mask(state.to_move ^ 1) & ~vanishing
+        score = 0
+        for w in rules.win_masks:
+            a = mine & w
+            b = theirs & w
+            if a and not b:
+                score += weights[popcount[a]]
+            elif b and not a:
+                score -= weights[popcount[b]]
+        return score
+
+
+def _to_table(score, ply):
+    """胜负分数存表时改为相对当前节点的步数，取出时再换回相对根节点"""
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
@@ -0,0 +1,102 @@
+"""按帧推进的非阻塞动画
+
+主循环以固定帧率运行（clock.tick(FPS)），每帧用当前时间（毫秒）计算各个补间动画
+的数值，动画期间不再阻塞事件处理：
+- Tween：在给定时长内从起始值线性变化到结束值
+- Animator：按名字管理多个补间，结束时调用回调
+- Popup：结果弹窗，缩放进场 -> 等待点击“确定” -> 缩放退场
+"""
+from pygame.locals import MOUSEBUTTONDOWN
+
+FPS = 60
+FADE_IN_MS = 540  # 落子淡入时长（原先为 18 帧 × 30 毫秒）
+POPUP_MS = 300    # 弹窗缩放时长（原先为 18 帧 × 1/60 秒）
+
+
+class Tween:
+    def __init__(self, start, end, duration, now, on_done=None):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.begin = now
+        self.on_done = on_done
+
+    def progress(self, now):
+        if self.duration <= 0:
+            return 1.0
+        return min(max((now - self.begin) / self.duration, 0.0), 1.0)
+
+    def value(self, now):
+        return self.start + (self.end - self.start) * self.progress(now)
+
+    def finished(self, now):
+        return now - self.begin >= self.duration
+
+
+class Animator:
+    def __init__(self):
+        self.tweens = {}
+
+    def start(self, key, start, end, duration, now, on_done=None):
+        self.tweens[key] = Tween(start, end, duration, now, on_done)
+
+    def active(self, key=None):
+        """key 为 None 时判断是否还有任何动画在进行"""
+        return bool(self.tweens) if key is None else key in self.tweens
+
+    def value(self, key, now, default=None):
+        tween = self.tweens.get(key)
+        return tween.value(now) if tween else default
+
+    def values(self, now):
+        return {key: tween.value(now) for key, tween in self.tweens.items()}
+
+    def update(self, now):
+        """移除已结束的动画并调用其回调"""
+        for key, tween in list(self.tweens.items()):
+            if tween.finished(now):
+                del self.tweens[key]
+                if tween.on_done:
+                    tween.on_done()
+
+    def clear(self):
+        self.tweens = {}
+
+
+class Popup:
+    """非阻塞的结果弹窗；closed 为 True 后由调用方丢弃"""
+
+    def __init__(self, renderer, message, final_rect, button_rect, now):
+        self.renderer = renderer
+        self.message = message
+        self.final_rect = final_rect
+        self.button_rect = button_rect
+        # 保存弹窗下方的画面，每帧只需恢复并刷新这一块区域
+        self.saved = renderer.screen.subsurface(final_rect).copy()
+        self.tween = Tween(0.1, 1.0, POPUP_MS, now)
+        self.waiting = False
+        self.closed = False
+
+    def handle_event(self, event, now):
+        if self.waiting and event.type == MOUSEBUTTONDOWN and self.button_rect.collidepoint(event.pos):
+            # 缩放动画（弹窗退场）
+            self.waiting = False
+            self.tween = Tween(1.0, 0.1, POPUP_MS, now)
+
+    def draw(self, now):
+        screen = self.renderer.screen
+        screen.blit(self.saved, self.final_rect)
+        self.renderer.dirty.append(self.final_rect)
+        if self.tween is not None and self.tween.finished(now):
+            if self.tween.end < 1.0:
+                self.closed = True
+                return
+            self.tween = None
+            self.waiting = True
+        scale = self.tween.value(now) if self.tween is not None else 1.0
+        current_rect = self.final_rect.copy()
+        current_rect.width *= scale
+        current_rect.height *= scale
+        current_rect.center = self.final_rect.center
+        self.renderer.draw_popup(current_rect, self.message, scale,
+                                 self.button_rect if self.waiting else None)
@@ -0,0 +1,193 @@
+"""无界面对战平台与吞吐量基准（不依赖 pygame）
+
+让两个 AI 对战 N 局，统计每秒对局数、每秒迭代数、平均每步耗时，以及胜/和/负
+比例及其 95% 置信区间；结果可以追加写入 JSON Lines 文件，便于比较不同版本。
+
+选手写法即 engines.py 中的引擎写法：
+    random                          随机落子
+    mcts                            默认参数的 MCTS
+    mcts:iterations=500,timeout=1   指定 MCTS 构造参数
+    alphabeta:timeout=0.2           迭代加深 alpha-beta，每步 0.2 秒
+
+示例：
+    python arena.py mcts:iterations=500 random --games 50 --output results.jsonl
+    python arena.py alphabeta:timeout=0.2 mcts --games 50
+    python arena.py mcts:iterations=300 random --size 9 --win-length 5 --max-pieces 0
+
+--iterations 后接逗号分隔的迭代次数时，对每个迭代次数各比一轮（两名 MCTS 选手
+使用相同的迭代次数），用于比较棋力随迭代次数的变化，例如 RAVE 与普通 UCB：
+    python arena.py mcts:rave=50 mcts --iterations 100,400 --games 60 --size 5 --win-length 4 --max-pieces 0
+"""
+import argparse
+import json
+import math
+import random
+import subprocess
+import time
+
+from engines import create_engine
+from game_rules import BitState, get_rules
+
+MAX_PLIES = 100  # 棋子消失可能导致无限循环，超过该步数判和
+
+
+def make_player(spec, rules=None):
+    """根据选手写法创建选手"""
+    return create_engine(spec, rules)
+
+
+def with_option(spec, key, value):
+    """在 MCTS 选手写法后追加一个构造参数（后写的同名参数覆盖先写的）"""
+    if spec.partition(':')[0] != 'mcts':
+        return spec
+    return f"{spec}{',' if ':' in spec else ':'}{key}={value}"
+
+
+def play_game(players, max_plies=MAX_PLIES, rules=None):
+    """players[0] 执 X 先行，返回 (胜者编号或 None, 每步记录 [(选手编号, 耗时, 迭代数)])"""
+    state = BitState(rules or get_rules())
+    moves = []
+    for player in players:
+        player.reset()
+    for _ in range(max_plies):
+        if not state.empty():
+            break  # 棋子不消失时棋盘下满，和棋
+        player = players[state.to_move]
+        start_time = time.perf_counter()
+        row, col = player.make_move(state.to_game_state())
+        elapsed = time.perf_counter() - start_time
+        moves.append((state.to_move, elapsed, player.last_iterations))
+        state.play(row * state.rules.size + col)
+        winner = state.winner()
+        if winner is not None:
+            return winner, moves
+    return None, moves
+
+
+def wilson_interval(successes, n, z=1.96):
+    """二项比例的 Wilson 置信区间"""
+    if n == 0:
+        return (0.0, 0.0)
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return (max(0.0, center - margin), min(1.0, center + margin))
+
+
+def run_match(spec_a, spec_b, games, alternate=True, rules=None):
+    """A 与 B 对战，alternate 为 True 时每局交换先后手；结果以 A 的视角统计"""
+    rules = rules or get_rules()
+    players = (make_player(spec_a, rules), make_player(spec_b, rules))
+    outcomes = {'win': 0, 'draw': 0, 'loss': 0}
+    move_time = [0.0, 0.0]
+    move_count = [0, 0]
+    iterations = [0, 0]
+    plies = 0
+    start_time = time.perf_counter()
+
+    for game in range(games):
+        a_side = game % 2 if alternate else 0
+        seats = (players[0], players[1]) if a_side == 0 else (players[1], players[0])
+        winner, moves = play_game(seats, rules=rules)
+        plies += len(moves)
+        for side, elapsed, count in moves:
+            who = 0 if side == a_side else 1
+            move_time[who] += elapsed
+            move_count[who] += 1
+            iterations[who] += count
+        if winner is None:
+            outcomes['draw'] += 1
+        elif winner == a_side:
+            outcomes['win'] += 1
+        else:
+            outcomes['loss'] += 1
+
+    elapsed = time.perf_counter() - start_time
+    for player in players:
+        player.close()
+
+    summary = {
+        'a': spec_a,
+        'b': spec_b,
+        'rules': rules.params(),
+        'games': games,
+        'elapsed': elapsed,
+        'games_per_second': games / elapsed if elapsed else 0.0,
+        'average_plies': plies / games if games else 0.0,
+    }
+    for key, value in outcomes.items():
+        summary[f'{key}_rate'] = value / games if games else 0.0
+        summary[f'{key}_ci95'] = wilson_interval(value, games)
+    for who, label in ((0, 'a'), (1, 'b')):
+        search_time = move_time[who]
+        summary[f'{label}_move_seconds'] = search_time / move_count[who] if move_count[who] else 0.0
+        summary[f'{label}_iterations_per_second'] = iterations[who] / search_time if search_time else 0.0
+    return summary
+
+
+def engine_version():
+    """当前代码的 git 提交号，用于区分不同版本的结果"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(summary):
+    print(f"{summary['a']}  对  {summary['b']}：{summary['games']} 局，用时 {summary['elapsed']:.1f} 秒，"
+          f"{summary['games_per_second']:.2f} 局/秒，平均 {summary['average_plies']:.1f} 步")
+    for key, name in (('win', '胜'), ('draw', '和'), ('loss', '负')):
+        low, high = summary[f'{key}_ci95']
+        print(f"  A {name}：{summary[f'{key}_rate']:6.1%}  (95% 置信区间 {low:.1%} - {high:.1%})")
+    for label in ('a', 'b'):
+        print(f"  {label.upper()}：平均每步 {summary[f'{label}_move_seconds'] * 1000:.1f} 毫秒，"
+              f"{summary[f'{label}_iterations_per_second']:.0f} 次迭代/秒")
+
+
+def print_sweep(summaries):
+    print("迭代次数    A 胜     和    A 负")
+    for summary in summaries:
+        print(f"{summary['iterations']:>8}  {summary['win_rate']:6.1%} {summary['draw_rate']:6.1%} "
+              f"{summary['loss_rate']:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面 AI 对战与基准测试")
+    parser.add_argument('a', help="选手 A，例如 mcts:iterations=500")
+    parser.add_argument('b', nargs='?', default='random', help="选手 B（默认 random）")
+    parser.add_argument('--games', type=int, default=20, help="对局数")
+    parser.add_argument('--no-alternate', action='store_true', help="A 始终执 X 先行")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子")
+    parser.add_argument('--size', type=int, default=3, help="棋盘边长")
+    parser.add_argument('--win-length', type=int, default=3, help="连成几子获胜")
+    parser.add_argument('--max-pieces', type=int, default=6, help="场上最多棋子数，0 表示棋子不消失")
+    parser.add_argument('--output', help="把结果追加写入该 JSON Lines 文件")
+    parser.add_argument('--iterations', help="逗号分隔的迭代次数列表，对每个迭代次数各比一轮")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    rules = get_rules(args.size, args.win_length, args.max_pieces or None)
+    rounds = [(args.a, args.b, None)]
+    if args.iterations:
+        rounds = [(with_option(args.a, 'iterations', n), with_option(args.b, 'iterations', n), n)
+                  for n in map(int, args.iterations.split(','))]
+    summaries = []
+    for spec_a, spec_b, iterations in rounds:
+        summary = run_match(spec_a, spec_b, args.games, alternate=not args.no_alternate, rules=rules)
+        summary['iterations'] = iterations
+        summary['version'] = engine_version()
+        summary['timestamp'] = time.time()
+        print_summary(summary)
+        summaries.append(summary)
+        if args.output:
+            with open(args.output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+    if args.iterations:
+        print_sweep(summaries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""NumPy 批量模拟：把成千上万局快速对弈表示成数组，整批向量化推进
+
+所有对局从同一个局面出发，每一步都各下一子，所以棋子数、环形队列的队首
+和行棋方在整批中是一致的，只有 X/O 掩码和队列中的格子因对局而异。
+落子策略与 MCTS.simulation 相同：能赢就赢，其次堵住对手，其次潜在威胁，
+再依次是中心、角和随机。
+
+需要 numpy：pip install numpy
+"""
+import time
+
+import numpy as np
+
+from game_rules import (BitState, CELL_LIST, CELLS, CENTER, COMPLETES,
+                        CORNER_MASK, FULL_MASK, IS_WIN, MAX_PIECES, POPCOUNT,
+                        WIN_MASKS)
+
+_COMPLETES = np.array(COMPLETES, dtype=np.int32)
+_IS_WIN = np.array(IS_WIN, dtype=bool)
+_POPCOUNT = np.array(POPCOUNT, dtype=np.int8)
+_LOWEST = np.array([cells[0] if cells else -1 for cells in CELL_LIST], dtype=np.int8)
+_BITS = np.array([[m >> c & 1 for c in range(CELLS)] for m in range(1 << CELLS)], dtype=bool)
+_CENTER_BIT = 1 << CENTER
+
+
+class BatchRollout:
+    """从同一局面出发批量进行快速对弈"""
+
+    def __init__(self, batch_size=1024, max_steps=20, seed=None):
+        self.batch_size = batch_size
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+    def _random_cell(self, masks):
+        """在每行掩码的格子中均匀随机选一个"""
+        keys = np.where(_BITS[masks], self.rng.random((len(masks), CELLS)), -1.0)
+        return keys.argmax(axis=1).astype(np.int8)
+
+    def rollout(self, state):
+        """返回每局的结果数组（O 视角：O 胜 1，X 胜 -1，和或步数用尽 0）"""
+        n = self.batch_size
+        masks = [np.full(n, state.x, dtype=np.int32), np.full(n, state.o, dtype=np.int32)]
+        queue = np.tile(np.array(state.queue, dtype=np.int8), (n, 1))
+        head, count, to_move = state.head, state.count, state.to_move
+        results = np.zeros(n, dtype=np.int8)
+        active = np.ones(n, dtype=bool)
+        rows = np.arange(n)
+
+        for _ in range(self.max_steps):
+            own, opp = masks[to_move], masks[to_move ^ 1]
+            empty = FULL_MASK & ~(own | opp)
+
+            # 本步和对手下一步各自会消失的棋子（整批一致的队列位置）
+            own_vanish = 0
+            if count == MAX_PIECES:
+                own_vanish = 1 << queue[:, head].astype(np.int32)
+            opp_vanish = 0
+            if count + 1 >= MAX_PIECES:
+                index = (head + count + 1 - MAX_PIECES) % MAX_PIECES
+                opp_vanish = 1 << queue[:, index].astype(np.int32)
+
+            # 进攻策略：能赢直接结束
+            win = _COMPLETES[own & ~own_vanish] & empty
+            won = active & (win != 0)
+            results[won] = 1 if to_move else -1
+            active &= ~won
+            if not active.any():
+                break
+
+            block = _COMPLETES[opp & ~opp_vanish] & empty
+            threat = np.zeros(n, dtype=np.int32)
+            for w in WIN_MASKS:
+                hit = (_POPCOUNT[opp & w] == 1) & (_POPCOUNT[empty & w] == 2)
+                threat |= np.where(hit, empty & w, 0)
+
+            cell = np.where(
+                block != 0, _LOWEST[block],
+                np.where(threat != 0, self._random_cell(threat),
+                         np.where(empty & _CENTER_BIT != 0, CENTER,
+                                  np.where(empty & CORNER_MASK != 0, _LOWEST[empty & CORNER_MASK],
+                                           self._random_cell(empty)))))
+
+            # 落子：满 6 子时先移除队首棋子，新棋子占用它的槽位
+            if count == MAX_PIECES:
+                old = ~(1 << queue[:, head].astype(np.int32))
+                masks[0] = np.where(active, masks[0] & old, masks[0])
+                masks[1] = np.where(active, masks[1] & old, masks[1])
+                slot = head
+                head = (head + 1) % MAX_PIECES
+            else:
+                slot = (head + count) % MAX_PIECES
+                count += 1
+            queue[rows, slot] = np.where(active, cell, queue[:, slot])
+            masks[to_move] = np.where(active, masks[to_move] | (1 << cell.astype(np.int32)), masks[to_move])
+            to_move ^= 1
+
+        return results
+
+    def mean_result(self, state):
+        return float(self.rollout(state).mean())
+
+
+if __name__ == "__main__":
+    from mcts_ai import MCTS
+
+    state = BitState()
+    state.play(0)
+    engine = BatchRollout(batch_size=4096)
+    start_time = time.perf_counter()
+    outcome = engine.mean_result(state)
+    elapsed = time.perf_counter() - start_time
+    print(f"批量模拟：{engine.batch_size / elapsed:.0f} 局/秒，平均结果 {outcome:+.3f}")
+
+    ai = MCTS()
+    total = 0
+    start_time = time.perf_counter()
+    for _ in range(1000):
+        total += ai.simulation(state)
+    elapsed = time.perf_counter() - start_time
+    print(f"逐局模拟：{1000 / elapsed:.0f} 局/秒，平均结果 {total / 1000:+.3f}")
@@ -0,0 +1,95 @@
+"""AI 引擎的统一接口与注册表
+
+所有引擎都提供 make_move(game_state) -> (row, col)，game_state 即界面使用的
+(board, piece_positions)。此外还有：
+- reset()：新的一局开始时丢弃保留的搜索结果
+- ponder(game_state)：对手思考期间在后台继续搜索，直到 stop_event 被置位
+- close()：关闭进程池、保存缓存等
+- stop_event：置位后正在进行的搜索尽快结束
+- last_iterations：上一次 make_move 的搜索量（MCTS 为迭代次数，alpha-beta 为节点数）
+- last_stats：profile 开启时为 SearchStats，否则为 None
+- progress：可选的回调 progress(move, pv, iterations, elapsed)，搜索过程中大约每
+  PROGRESS_INTERVAL 秒及搜索结束时调用一次，汇报当前最佳落子 (row, col)、主要变例
+  [(row, col), ...]、已完成的搜索量和已用时间（秒）；在搜索线程中调用，应尽快返回
+
+引擎按名称注册，用 "名称:参数=值,..." 的写法创建，例如：
+    create_engine('alphabeta:timeout=0.5,max_depth=12', rules)
+Tic_Tac_Toe.py、arena.py 和 move_service.py 都通过这种写法选择引擎。
+"""
+import ast
+import importlib
+import random
+import threading
+
+from game_rules import DEFAULT_RULES
+
+PROGRESS_INTERVAL = 0.1  # progress 回调的最短间隔（秒）
+
+# 名称 -> "模块:类名" 或可调用对象；模块在第一次创建该引擎时才导入
+ENGINES = {
+    'mcts': 'mcts_ai:MCTS',
+    'alphabeta': 'alphabeta:AlphaBeta',
+    'random': 'engines:RandomPlayer',
+}
+
+
+class Engine:
+    """引擎基类：除 make_move 外的接口都有默认实现"""
+
+    def __init__(self, rules=None, progress=None):
+        self.rules = rules or DEFAULT_RULES
+        self.progress = progress
+        self.last_iterations = 0
+        self.last_stats = None
+        self.stop_event = threading.Event()
+
+    def make_move(self, game_state):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+    def ponder(self, game_state):
+        pass
+
+    def close(self):
+        pass
+
+
+class RandomPlayer(Engine):
+    """随机落子的对照选手"""
+
+    def make_move(self, game_state):
+        board, _ = game_state
+        size = len(board)
+        return random.choice([(i, j) for i in range(size) for j in range(size) if board[i][j] is None])
+
+
+def register_engine(name, factory):
+    """注册引擎；factory 为 "模块:类名" 或可调用对象，调用时传入 rules 和构造参数"""
+    ENGINES[name] = factory
+
+
+def parse_spec(spec):
+    """"名称:参数=值,..." -> (名称, 参数字典)；值按 Python 字面量解析，解析失败时当作字符串"""
+    name, _, args = spec.partition(':')
+    kwargs = {}
+    for item in filter(None, args.split(',')):
+        key, _, value = item.partition('=')
+        try:
+            kwargs[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            kwargs[key] = value
+    return name, kwargs
+
+
+def create_engine(spec, rules=None, defaults=None):
+    """按写法创建引擎；defaults 为 {名称: 默认参数}，写法中给出的参数优先"""
+    name, kwargs = parse_spec(spec)
+    factory = ENGINES.get(name)
+    if factory is None:
+        raise ValueError(f"未知的引擎: {name}（可选：{'、'.join(ENGINES)}）")
+    if isinstance(factory, str):
+        module, _, attr = factory.partition(':')
+        factory = getattr(importlib.import_module(module), attr)
+    return factory(rules=rules, **{**(defaults or {}).get(name, {}), **kwargs})
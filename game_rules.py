@@ -0,0 +1,473 @@
+"""井字棋（棋子消失变体）的规则核心
+
+游戏界面和 AI 共用这里的胜负判断。规则由 Rules 描述：棋盘边长、连成几子获胜、
+场上最多同时存在几枚棋子（超过时最早的棋子消失）。默认为 3×3、三子连线、最多 6 子。
+
+每个 Rules 在创建时生成连线掩码等数据，位棋盘用 Python 整数表示，可以任意宽：
+- win_masks：所有连线的掩码
+- lines_through[cell]：经过某个格子的连线
+- is_win[mask]：某方的占位掩码是否已连成一线
+- completes[mask]：某方再下一子即可连成一线的格子掩码（未与空位求交）
+- threats[opp << cells | own]：经过这些空位的某条线上只有一枚 own 的棋子、其余为空
+- symmetries / sym_masks：棋盘 8 种旋转、翻转对应的格子置换和掩码变换
+- sym_compose / sym_inverse：对称变换的复合与求逆
+格子数不超过 TABLE_LIMIT 时 is_win、completes 等按掩码预先生成查找表，threats 按
+双方占位的组合预先生成（格子数不超过 PAIR_TABLE_LIMIT 时）；更大的棋盘用同样的
+下标写法，但每次由连线掩码现场计算。
+
+模块级的 BOARD_SIZE、WIN_MASKS、IS_WIN 等名字对应默认规则 DEFAULT_RULES。
+"""
+from functools import lru_cache
+
+TABLE_LIMIT = 16  # 格子数不超过该值时预先生成按掩码索引的查找表
+PAIR_TABLE_LIMIT = 9  # 格子数不超过该值时预先生成按双方占位组合索引的查找表（3^格子数 项）
+PLAYERS = ('X', 'O')  # 玩家编号：0 为 X，1 为 O
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def _mask_cells(mask):
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return tuple(cells)
+
+
+class _Computed:
+    """与查找表相同的下标写法，但按需计算（棋盘太大、无法预先生成时使用）"""
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+    def __getitem__(self, mask):
+        return self.func(mask)
+
+
+class Rules:
+    """size×size 棋盘、连成 win_length 子获胜、场上最多 max_pieces 枚棋子
+
+    max_pieces 为 None 时棋子不会消失，棋盘下满即为和棋。
+    """
+
+    def __init__(self, size=3, win_length=3, max_pieces=6):
+        if not 1 <= win_length <= size:
+            raise ValueError(f"连线长度 {win_length} 不适用于 {size}×{size} 棋盘")
+        self.size = size
+        self.win_length = win_length
+        self.cells = size * size
+        self.max_pieces = self.cells if max_pieces is None else max_pieces
+        if not 1 <= self.max_pieces <= self.cells:
+            raise ValueError(f"最多棋子数 {max_pieces} 超出棋盘格子数 {self.cells}")
+        self.full_mask = (1 << self.cells) - 1
+        self.cell_bits = max(self.cells - 1, 1).bit_length()  # 哈希中每个格子编号占的位数
+        self.center = (size // 2) * size + size // 2
+        self.corners = tuple(sorted({0, size - 1, self.cells - size, self.cells - 1}))
+        self.corner_mask = sum(1 << c for c in self.corners)
+
+        self.win_masks = self._build_lines()
+        self.lines_through = tuple(tuple(w for w in self.win_masks if w >> c & 1)
+                                   for c in range(self.cells))
+        self.symmetries = self._build_symmetries()  # symmetries[s][cell] 为变换后的格子
+        self.inverse_symmetries = tuple(tuple(perm.index(c) for c in range(self.cells))
+                                        for perm in self.symmetries)
+        # sym_compose[a][b]：先做变换 b 再做变换 a 所对应的变换编号；sym_inverse[s]：逆变换编号
+        self.sym_compose = tuple(
+            tuple(self.symmetries.index(tuple(pa[pb[c]] for c in range(self.cells)))
+                  for pb in self.symmetries)
+            for pa in self.symmetries
+        )
+        self.sym_inverse = tuple(self.symmetries.index(inv) for inv in self.inverse_symmetries)
+
+        if self.cells <= TABLE_LIMIT:
+            masks = range(1 << self.cells)
+            self.popcount = tuple(popcount(m) for m in masks)
+            self.cell_list = tuple(_mask_cells(m) for m in masks)
+            self.is_win = tuple(self._is_win(m) for m in masks)
+            self.completes = tuple(self._completes(m) for m in masks)
+            self.sym_masks = tuple(
+                tuple(sum(1 << perm[c] for c in self.cell_list[m]) for m in masks)
+                for perm in self.symmetries
+            )
+        else:
+            self.popcount = _Computed(popcount)
+            self.cell_list = _Computed(_mask_cells)
+            self.is_win = _Computed(self._is_win)
+            self.completes = _Computed(self._completes)
+            self.sym_masks = tuple(_Computed(self._chunked_permutation(perm))
+                                   for perm in self.symmetries)
+        if self.cells <= PAIR_TABLE_LIMIT:
+            # 只列出双方不重叠的组合
+            self.threats = {}
+            for own in range(1 << self.cells):
+                free = self.full_mask & ~own
+                opp = free
+                while True:
+                    key = opp << self.cells | own
+                    self.threats[key] = self._threats(key)
+                    if not opp:
+                        break
+                    opp = (opp - 1) & free
+        else:
+            self.threats = _Computed(self._threats)
+
+    def __repr__(self):
+        return f"Rules(size={self.size}, win_length={self.win_length}, max_pieces={self.max_pieces})"
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.params() == other.params()
+
+    def __hash__(self):
+        return hash(self.params())
+
+    def __reduce__(self):
+        # 传给其他进程时只传参数，由对方从缓存中取出（或生成一次）查找表
+        return get_rules, self.params()
+
+    def params(self):
+        return (self.size, self.win_length, self.max_pieces)
+
+    def _build_lines(self):
+        size, k = self.size, self.win_length
+        lines = []
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):  # 行、列、两条对角线方向
+            for r in range(size):
+                for c in range(size):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < size and 0 <= end_c < size:
+                        lines.append(sum(1 << ((r + dr * i) * size + c + dc * i) for i in range(k)))
+        return tuple(lines)
+
+    def _build_symmetries(self):
+        n = self.size - 1
+        transforms = (
+            lambda r, c: (r, c), lambda r, c: (c, n - r),
+            lambda r, c: (n - r, n - c), lambda r, c: (n - c, r),
+            lambda r, c: (r, n - c), lambda r, c: (n - r, c),
+            lambda r, c: (c, r), lambda r, c: (n - c, n - r),
+        )
+        perms = []
+        for f in transforms:
+            perm = []
+            for cell in range(self.cells):
+                r, c = f(*divmod(cell, self.size))
+                perm.append(r * self.size + c)
+            perms.append(tuple(perm))
+        return tuple(perms)
+
+    def _chunked_permutation(self, perm):
+        """掩码的格子置换：每 8 个格子一组预先算好变换结果，变换时逐组查表再合并"""
+        tables = [
+            tuple(sum(1 << perm[base + i] for i in range(8) if byte >> i & 1 and base + i < self.cells)
+                  for byte in range(256))
+            for base in range(0, self.cells, 8)
+        ]
+
+        def apply(mask):
+            result = 0
+            for table in tables:
+                if not mask:
+                    break
+                result |= table[mask & 255]
+                mask >>= 8
+            return result
+        return apply
+
+    def _is_win(self, mask):
+        return any(mask & w == w for w in self.win_masks)
+
+    def _completes(self, mask):
+        cells = 0
+        for w in self.win_masks:
+            rest = w & ~mask
+            if not rest:
+                # 已经连成一线：任何一格都算（与查找表的定义一致）
+                return self.full_mask & ~mask
+            if not rest & (rest - 1):
+                # 连线上恰好缺一格
+                cells |= rest
+        return cells
+
+    def _threats(self, key):
+        own = key & self.full_mask
+        empty = self.full_mask & ~(own | key >> self.cells)
+        cells = 0
+        for w in self.win_masks:
+            # 线上 own 的棋子只有一位，且除它以外全是空位
+            mine = own & w
+            if mine and not mine & (mine - 1) and w & ~empty == mine:
+                cells |= empty & w
+        return cells
+
+    def board_mask(self, board, player):
+        """把列表形式的棋盘转换为 player 的占位掩码"""
+        mask = 0
+        for i in range(self.size):
+            for j in range(self.size):
+                if board[i][j] == player:
+                    mask |= 1 << (i * self.size + j)
+        return mask
+
+    def check_win(self, board, player):
+        """检查胜利条件（列表形式的棋盘）"""
+        return self.is_win[self.board_mask(board, player)]
+
+
+@lru_cache(maxsize=None)
+def get_rules(size=3, win_length=3, max_pieces=6):
+    """相同参数的规则只生成一次"""
+    return Rules(size, win_length, max_pieces)
+
+
+DEFAULT_RULES = get_rules()
+
+# 默认规则（3×3）下的常量和查找表
+BOARD_SIZE = DEFAULT_RULES.size
+CELLS = DEFAULT_RULES.cells
+MAX_PIECES = DEFAULT_RULES.max_pieces  # 棋盘上最多同时存在的棋子数，超过时最早的棋子消失
+FULL_MASK = DEFAULT_RULES.full_mask
+CENTER = DEFAULT_RULES.center
+CORNERS = DEFAULT_RULES.corners
+CORNER_MASK = DEFAULT_RULES.corner_mask
+WIN_MASKS = DEFAULT_RULES.win_masks
+LINES_THROUGH = DEFAULT_RULES.lines_through
+POPCOUNT = DEFAULT_RULES.popcount
+IS_WIN = DEFAULT_RULES.is_win
+COMPLETES = DEFAULT_RULES.completes
+CELL_LIST = DEFAULT_RULES.cell_list
+SYMMETRIES = DEFAULT_RULES.symmetries
+INVERSE_SYMMETRIES = DEFAULT_RULES.inverse_symmetries
+SYM_COMPOSE = DEFAULT_RULES.sym_compose
+SYM_INVERSE = DEFAULT_RULES.sym_inverse
+SYM_MASKS = DEFAULT_RULES.sym_masks
+
+
+def lowest_cell(mask):
+    """取掩码中编号最小的格子"""
+    return (mask & -mask).bit_length() - 1
+
+
+def cells_of(mask):
+    """把掩码展开为格子编号列表"""
+    return list(_mask_cells(mask))
+
+
+def board_mask(board, player):
+    """把列表形式的棋盘转换为 player 的占位掩码（默认规则）"""
+    return DEFAULT_RULES.board_mask(board, player)
+
+
+def check_win(board, player):
+    """检查胜利条件（列表形式的棋盘，默认规则）"""
+    return DEFAULT_RULES.check_win(board, player)
+
+
+class BitState:
+    """位棋盘游戏状态：X/O 各一个占位掩码，加上记录落子顺序的定长环形队列"""
+    __slots__ = ('rules', 'x', 'o', 'queue', 'head', 'count', 'to_move', 'history')
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = rules
+        self.x = 0
+        self.o = 0
+        self.queue = [0] * rules.max_pieces  # 格子编号 row * size + col，按落子顺序排列
+        self.head = 0                        # 最早棋子所在的槽位
+        self.count = 0
+        self.to_move = 0
+        self.history = []                    # apply() 记录的撤销信息
+
+    @classmethod
+    def from_game_state(cls, game_state, rules=DEFAULT_RULES):
+        """由界面使用的 (board, piece_positions) 转换而来"""
+        _, pieces = game_state
+        state = cls(rules)
+        for row, col, player in pieces[-rules.max_pieces:]:
+            state.push(row * rules.size + col, PLAYERS.index(player))
+        if pieces:
+            state.to_move = 1 - PLAYERS.index(pieces[-1][2])
+        return state
+
+    def to_game_state(self):
+        size = self.rules.size
+        board = [[None] * size for _ in range(size)]
+        pieces = []
+        for cell in self.pieces():
+            row, col = divmod(cell, size)
+            player = PLAYERS[self.o >> cell & 1]
+            board[row][col] = player
+            pieces.append((row, col, player))
+        return (board, pieces)
+
+    def copy(self):
+        new = BitState.__new__(BitState)
+        new.rules = self.rules
+        new.x = self.x
+        new.o = self.o
+        new.queue = self.queue[:]
+        new.head = self.head
+        new.count = self.count
+        new.to_move = self.to_move
+        new.history = []
+        return new
+
+    def mask(self, player):
+        return self.o if player else self.x
+
+    def empty(self):
+        return self.rules.full_mask & ~(self.x | self.o)
+
+    def pieces(self):
+        """按落子顺序返回场上棋子的格子编号"""
+        limit = self.rules.max_pieces
+        return [self.queue[(self.head + i) % limit] for i in range(self.count)]
+
+    def vanishing(self, ply=0):
+        """第 ply 步之后（0 为当前行棋方这一步）将消失的棋子掩码，没有则为 0"""
+        limit = self.rules.max_pieces
+        index = self.count + ply - limit
+        if index < 0:
+            return 0
+        return 1 << self.queue[(self.head + index) % limit]
+
+    def push(self, cell, player):
+        limit = self.rules.max_pieces
+        if self.count == limit:
+            # 队列已满：先移除最早的棋子，新棋子占用它的槽位
+            old = 1 << self.queue[self.head]
+            self.x &= ~old
+            self.o &= ~old
+            self.queue[self.head] = cell
+            self.head = (self.head + 1) % limit
+        else:
+            self.queue[(self.head + self.count) % limit] = cell
+            self.count += 1
+        if player:
+            self.o |= 1 << cell
+        else:
+            self.x |= 1 << cell
+
+    def play(self, cell):
+        """当前行棋方在 cell 落子（含棋子消失），并交换行棋方"""
+        self.push(cell, self.to_move)
+        self.to_move ^= 1
+
+    def apply(self, cell):
+        """与 play 相同，但记录被挤掉的棋子，以便 undo() 撤销"""
+        head = self.head
+        limit = self.rules.max_pieces
+        if self.count == limit:
+            # 队列已满：移除最早的棋子，新棋子占用它的槽位；记录 格子 << 1 | 所属方
+            removed = self.queue[head]
+            bit = 1 << removed
+            if self.o & bit:
+                self.o ^= bit
+                self.history.append(removed << 1 | 1)
+            else:
+                self.x ^= bit
+                self.history.append(removed << 1)
+            self.queue[head] = cell
+            self.head = (head + 1) % limit
+        else:
+            self.history.append(-1)
+            self.queue[(head + self.count) % limit] = cell
+            self.count += 1
+        if self.to_move:
+            self.o |= 1 << cell
+            self.to_move = 0
+        else:
+            self.x |= 1 << cell
+            self.to_move = 1
+
+    def undo(self):
+        """撤销最近一次 apply()，包括恢复因此消失的棋子"""
+        entry = self.history.pop()
+        limit = self.rules.max_pieces
+        self.to_move ^= 1
+        if entry < 0:
+            self.count -= 1
+            bit = 1 << self.queue[(self.head + self.count) % limit]
+        else:
+            # 新棋子占用了被挤掉棋子的槽位，把它放回去
+            head = self.head = (self.head - 1) % limit
+            bit = 1 << self.queue[head]
+            removed = entry >> 1
+            self.queue[head] = removed
+            if entry & 1:
+                self.o |= 1 << removed
+            else:
+                self.x |= 1 << removed
+        if self.to_move:
+            self.o ^= bit
+        else:
+            self.x ^= bit
+
+    def winner(self):
+        """刚落子的一方是否已连成一线，是则返回其编号，否则返回 None"""
+        mover = self.to_move ^ 1
+        return mover if self.rules.is_win[self.mask(mover)] else None
+
+
+def winning_cells(state, player):
+    """player 下一手可以直接连成一线的空位掩码（考虑落子时自己最早的棋子消失）"""
+    rules = state.rules
+    limit = rules.max_pieces
+    own = state.o if player else state.x
+    index = state.count - limit
+    if player != state.to_move:
+        # 行棋方先落一子，那时消失的棋子也不再计入；棋子上限为奇数时它可能属于 player
+        if index >= 0:
+            own &= ~(1 << state.queue[(state.head + index) % limit])
+        index += 1
+    if index >= 0:
+        own &= ~(1 << state.queue[(state.head + index) % limit])
+    return rules.completes[own] & rules.full_mask & ~(state.x | state.o)
+
+
+def threat_cells(state, player):
+    """经过这些空位的某条线上恰好只有一枚 player 的棋子、其余格子为空（查表）"""
+    rules = state.rules
+    return rules.threats[state.mask(player ^ 1) << rules.cells | state.mask(player)]
+
+
+def _pack_key(rules, count, x, to_move, cells):
+    bits = rules.cell_bits
+    key = (count << rules.cells | x) << 1 | to_move
+    for cell in cells:
+        key = key << bits | cell
+    return key << bits * (rules.max_pieces - count)
+
+
+def key_bits(rules):
+    """局面哈希最多占用的位数"""
+    return rules.max_pieces.bit_length() + rules.cells + 1 + rules.cell_bits * rules.max_pieces
+
+
+def state_key(state):
+    """局面的整数哈希：棋子数、X 的掩码、行棋方和落子顺序（O 的掩码可由此推出）"""
+    return _pack_key(state.rules, state.count, state.x, state.to_move, state.pieces())
+
+
+def canonical_key(state):
+    """在 8 种对称变换下取最小的哈希，返回 (哈希, 对应的变换编号)"""
+    rules = state.rules
+    pieces = state.pieces()
+    # 与 _pack_key 相同的打包方式，展开在循环里以减少函数调用
+    bits = rules.cell_bits
+    prefix = state.count << rules.cells
+    tail = bits * (rules.max_pieces - state.count)
+    x, to_move = state.x, state.to_move
+    best_key = None
+    best_sym = 0
+    for sym, perm in enumerate(rules.symmetries):
+        key = (prefix | rules.sym_masks[sym][x]) << 1 | to_move
+        for cell in pieces:
+            key = key << bits | perm[cell]
+        key <<= tail
+        if best_key is None or key < best_key:
+            best_key = key
+            best_sym = sym
+    return best_key, best_sym
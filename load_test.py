@@ -0,0 +1,116 @@
+"""落子服务的压测工具：多个并发客户端不断请求落子，统计吞吐量和延迟分位数
+
+先启动服务，再运行：
+    python move_service.py --workers 4
+    python load_test.py --concurrency 16 --requests 400 --timeout 0.2
+
+每个请求的局面由随机对弈生成（规则取自服务的 /stats）。被服务以 503 拒绝的
+请求单独计数，不计入延迟统计；加上 --retry 时改为稍后重试，延迟包括重试的等待。
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from game_rules import BitState, cells_of, get_rules
+from move_service import percentile
+
+RETRY_DELAY = 0.05  # --retry 时被拒绝后等待多久再试（秒）
+
+
+def random_position(rules, max_plies=20):
+    """随机对弈若干步得到一个尚未结束的局面"""
+    while True:
+        state = BitState(rules)
+        for _ in range(random.randint(0, max_plies)):
+            empty = cells_of(state.empty())
+            if not empty or state.winner() is not None:
+                break
+            state.play(random.choice(empty))
+        if state.winner() is None and state.empty():
+            return state.to_game_state()
+
+
+def request_json(url, payload=None, timeout=30):
+    data = None if payload is None else json.dumps(payload).encode('utf-8')
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_load(url, concurrency, requests, timeout=None, iterations=None, retry=False):
+    """并发发送 requests 个落子请求，返回统计结果"""
+    rules = get_rules(*request_json(url + '/stats')['rules'])
+    latencies = []
+    counts = {'ok': 0, 'rejected': 0, 'error': 0}
+    lock = threading.Lock()
+
+    def one_request(_):
+        board, pieces = random_position(rules)
+        payload = {'board': board, 'pieces': pieces}
+        if timeout is not None:
+            payload['timeout'] = timeout
+        if iterations is not None:
+            payload['iterations'] = iterations
+        start_time = time.perf_counter()
+        try:
+            while True:
+                try:
+                    request_json(url + '/move', payload)
+                    break
+                except urllib.error.HTTPError as e:
+                    if e.code != 503:
+                        raise
+                    with lock:
+                        counts['rejected'] += 1
+                    if not retry:
+                        return
+                    time.sleep(RETRY_DELAY)
+        except OSError:
+            with lock:
+                counts['error'] += 1
+            return
+        elapsed = time.perf_counter() - start_time
+        with lock:
+            counts['ok'] += 1
+            latencies.append(elapsed)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start_time
+
+    latencies.sort()
+    summary = dict(counts, concurrency=concurrency, requests=requests, elapsed=elapsed,
+                   throughput=counts['ok'] / elapsed if elapsed else 0.0)
+    for q in (50, 90, 99):
+        summary[f'p{q}'] = percentile(latencies, q)
+    summary['max'] = latencies[-1] if latencies else 0.0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="落子服务压测")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--concurrency', type=int, default=8, help="并发客户端数")
+    parser.add_argument('--requests', type=int, default=200, help="请求总数")
+    parser.add_argument('--timeout', type=float, default=None, help="每个请求的时间预算（秒）")
+    parser.add_argument('--iterations', type=int, default=None, help="每个请求的迭代次数")
+    parser.add_argument('--retry', action='store_true', help="被拒绝的请求稍后重试")
+    args = parser.parse_args()
+
+    summary = run_load(args.url.rstrip('/'), args.concurrency, args.requests,
+                       args.timeout, args.iterations, args.retry)
+    print(f"{summary['requests']} 个请求，{summary['concurrency']} 个并发，用时 {summary['elapsed']:.1f} 秒")
+    print(f"  成功 {summary['ok']}，被拒绝 {summary['rejected']}，出错 {summary['error']}，"
+          f"吞吐量 {summary['throughput']:.1f} 次/秒")
+    print(f"  延迟 p50 {summary['p50'] * 1000:.0f}ms  p90 {summary['p90'] * 1000:.0f}ms  "
+          f"p99 {summary['p99'] * 1000:.0f}ms  最大 {summary['max'] * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
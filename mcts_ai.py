@@ -1,266 +1,905 @@
 import math
+import multiprocessing
 import random
-from copy import deepcopy
 import time
+from array import array
 
-class Node:
-    def __init__(self, game_state, parent=None):
-        self.parent = parent
-        self.children = []
-        self.wins = 0
-        self.visits = 0
-        self.untried_actions = None
-        self.game_state = game_state  # (board, piece_positions)
-        
-    def ucb_score(self, exploration=1.5):
-        if self.visits == 0:
-            return float('inf')
-        return (self.wins / self.visits) + exploration * math.sqrt(math.log(self.parent.visits) / self.visits)
-
-class MCTS:
-    def __init__(self, iterations=3000, timeout=3):
+from engines import PROGRESS_INTERVAL, Engine
+from game_rules import (DEFAULT_RULES, BitState, canonical_key, cells_of,
+                        key_bits, lowest_cell, state_key, threat_cells,
+                        winning_cells)
+from opening_book import MoveCache
+from search_stats import (STOP_BLOCK, STOP_CACHE, STOP_CANCELLED, STOP_DECIDED,
+                          STOP_FORCED, STOP_ITERATIONS, STOP_PARALLEL,
+                          STOP_PROVEN, STOP_SETTLED, STOP_TABLE, STOP_TIMEOUT,
+                          STOP_WIN, SearchStats)
+from solver import PerfectPlayTable
+from time_manager import TimeManager
+
+SIGN = (-1, 1)  # 结果统一用 O 的视角：O 胜为 1，X 胜为 -1
+CHECK_INTERVAL = 64  # 每完成这么多次迭代检查一次能否提前结束、是否需要汇报进度
+PV_LENGTH = 8        # 汇报的主要变例最多几步
+POOL_POLL = 0.05     # 并行搜索时每隔这么多秒检查一次 stop_event
+MAX_ROLLOUT_STEPS = 40  # 模拟步数上限：默认规则下很少达到，大棋盘上的模拟常迟迟分不出胜负
+# PUCT 先验：按落子的类别给权重，同一节点的各落子归一化后作为先验概率
+# 权重不宜过大：棋子消失规则下中心、角和阻挡并不总是好棋，先验过强会让搜索偏离
+PRIOR_WIN = 4.0      # 直接获胜
+PRIOR_BLOCK = 2.0    # 阻止对手下一手获胜
+PRIOR_FORK = 2.0     # 落子后同时有两处可以获胜（双威胁）
+PRIOR_THREAT = 2.0   # 落在只有一枚对手棋子的线上（提前封堵）
+PRIOR_CENTER = 1.25
+PRIOR_CORNER = 1.1
+
+_worker_ai = None  # 并行模式下每个工作进程各自持有的搜索器
+
+
+class SearchTree:
+    """数组存储的搜索图（struct-of-arrays）
+
+    每个节点对应一个对称归一化后的局面，只保存统计量和出边，不保存局面本身；
+    局面在下降过程中由根局面逐步落子还原。出边 e 记录：
+    - edge_action[e]：以父节点归一化坐标表示的落子
+    - edge_child[e]：子节点编号，-1 表示尚未展开
+    - edge_sym[e]：父节点坐标下落子后的局面再做该变换即得到子节点的归一化局面
+    - amaf_visits[e] / amaf_wins[e]：RAVE 模式下的 AMAF 统计（以该落子方为视角）
+    - edge_prior[e]：PUCT 模式下该落子的先验概率，生成出边时计算一次
+
+    proven[node] 记录已证明的胜负（MCTS-Solver）：0 为未知，正数为进入该节点的
+    落子方必胜，负数为其必败；绝对值为到分出胜负还剩的步数加 1。
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, rave=False, priors=False):
+        self.rules = rules
+        self.rave = rave
+        self.priors = priors
+        # 大棋盘的局面哈希超过 64 位时改用列表；格子编号超过 127 时改用 16 位整数
+        cell_code = 'b' if rules.cells < 128 else 'h'
+        self.index = {}                 # 归一化局面哈希 -> 节点编号
+        self.key = array('q') if key_bits(rules) < 64 else []
+        self.visits = array('l')
+        self.wins = array('d')          # 以进入该节点的落子方为视角累计
+        self.terminal = array('b')
+        self.proven = array('h')
+        self.first_edge = array('l')    # -1 表示尚未生成出边
+        self.edge_count = array(cell_code)
+        self.untried = array(cell_code)  # 尚未展开的出边数
+        self.edge_action = array(cell_code)
+        self.edge_child = array('l')
+        self.edge_sym = array('b')
+        self.amaf_visits = array('l')  # 只在 rave 为 True 时随出边增长
+        self.amaf_wins = array('d')
+        self.edge_prior = array('f')   # 只在 priors 为 True 时随出边增长
+
+    def __len__(self):
+        return len(self.key)
+
+    def add_node(self, key, terminal, proven=0):
+        node = len(self.key)
+        self.index[key] = node
+        self.key.append(key)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        self.terminal.append(terminal)
+        self.proven.append(proven)
+        self.first_edge.append(-1)
+        self.edge_count.append(0)
+        self.untried.append(0)
+        return node
+
+    def add_edges(self, node, actions, syms, priors=None):
+        self.first_edge[node] = len(self.edge_action)
+        self.edge_count[node] = len(actions)
+        self.untried[node] = len(actions)
+        self.edge_action.extend(actions)
+        self.edge_sym.extend(syms)
+        self.edge_child.extend([-1] * len(actions))
+        if self.rave:
+            self.amaf_visits.extend([0] * len(actions))
+            self.amaf_wins.extend([0.0] * len(actions))
+        if self.priors:
+            self.edge_prior.extend(priors)
+
+    def edges(self, node):
+        first = self.first_edge[node]
+        return range(first, first + self.edge_count[node]) if first >= 0 else range(0)
+
+    def compact(self, root):
+        """只保留从 root 可到达的节点，返回新树中 root 的编号（即 0）"""
+        new = SearchTree(self.rules, self.rave, self.priors)
+        remap = {root: new.add_node(self.key[root], self.terminal[root], self.proven[root])}
+        order = [root]
+        for node in order:
+            for e in self.edges(node):
+                child = self.edge_child[e]
+                if child >= 0 and child not in remap:
+                    remap[child] = new.add_node(self.key[child], self.terminal[child], self.proven[child])
+                    order.append(child)
+        for node in order:
+            new_node = remap[node]
+            new.visits[new_node] = self.visits[node]
+            new.wins[new_node] = self.wins[node]
+            edges = self.edges(node)
+            if self.first_edge[node] >= 0:
+                new.add_edges(new_node, [self.edge_action[e] for e in edges],
+                              [self.edge_sym[e] for e in edges],
+                              [self.edge_prior[e] for e in edges] if self.priors else None)
+                new.untried[new_node] = self.untried[node]
+                for i, e in enumerate(edges):
+                    child = self.edge_child[e]
+                    new_e = new.first_edge[new_node] + i
+                    new.edge_child[new_e] = remap[child] if child >= 0 else -1
+                    if self.rave:
+                        new.amaf_visits[new_e] = self.amaf_visits[e]
+                        new.amaf_wins[new_e] = self.amaf_wins[e]
+        return new
+
+
+class MCTS(Engine):
+    def __init__(self, iterations=3000, timeout=3, table_path=None,
+                 workers=0, worker_iterations=None, rollout_batch=0, profile=False, rules=None,
+                 cache_size=0, cache_path=None, book_path=None, rave=0,
+                 early_stop=True, progress=None, time_budget=None, session_budget=False, puct=0):
+        # 棋盘大小、连线长度和最多棋子数，默认为 3×3 三子连线、最多 6 子；
+        # progress 为搜索过程中汇报当前最佳落子和主要变例的回调，见 engines.py
+        super().__init__(rules, progress)
+        if self.rules != DEFAULT_RULES and (table_path or rollout_batch):
+            raise ValueError("完美下法表和批量模拟只支持默认规则")
         self.iterations = iterations
         self.timeout = timeout
-    
-    def get_legal_actions(self, game_state):
-        board, _ = game_state
-        return [(i, j) for i in range(3) for j in range(3) if board[i][j] is None]
-
-    def simulate_move(self, game_state, action):
-        new_board = deepcopy(game_state[0])
-        new_pieces = deepcopy(game_state[1])
-        player = 'O' if len(new_pieces) % 2 == 1 else 'X'
-        
-        # 应用新移动
-        row, col = action
-        new_board[row][col] = player
-        new_pieces.append((row, col, player))
-        
-        # 处理棋子消失
-        if len(new_pieces) > 6:
-            removed = new_pieces.pop(0)
-            new_board[removed[0]][removed[1]] = None
-            
-        return (new_board, new_pieces)
+        # 提前结束：领先的落子在剩余的迭代次数内已不可能被超过时停止搜索
+        self.early_stop = early_stop
+        # 时间管理：time_budget 为每局（session_budget 为 True 时为整个会话）的总思考时间（秒），
+        # 每步的时间由 TimeManager 按局面分配，timeout 不再使用；iterations 仍是每步的迭代上限
+        self.time_manager = None
+        if time_budget is not None:
+            self.time_manager = TimeManager(time_budget, per_game=not session_budget)
+        # RAVE：rave > 0 时记录 AMAF 统计并在选择时按 β = sqrt(rave / (3n + rave)) 混合，
+        # rave 即两种估计权重相等时的访问次数量级；为 0 时使用普通 UCB
+        self.rave = rave
+        if rave and rollout_batch:
+            raise ValueError("RAVE 需要逐步记录模拟中的落子，不支持批量模拟")
+        # PUCT：puct > 0 时按 Q + puct · P · √N / (1 + n) 选择，P 为由威胁判断得到的先验概率，
+        # 未展开的落子也参与比较，先验高的先展开；为 0 时使用普通 UCB
+        self.puct = puct
+        if puct and rave:
+            raise ValueError("PUCT 和 RAVE 不能同时使用")
+        # 性能统计：profile 为 True 时每次 make_move 后 last_stats 为 SearchStats，否则为 None
+        self.profile = profile
+        self.rollout_steps = None  # 最近一次模拟的步数
+        # 批量模拟：rollout_batch > 0 时每个叶节点用 NumPy 一次模拟这么多局并取平均
+        self.rollout_batch = rollout_batch
+        self.batch = None
+        if rollout_batch:
+            from batch_rollout import BatchRollout  # 需要 numpy
+            self.batch = BatchRollout(rollout_batch)
+        # 根并行：workers > 1 时由多个进程各自从根开始独立搜索，再合并统计
+        self.workers = workers
+        self.worker_iterations = worker_iterations or iterations
+        self.pool = None
+        # 可选：由 solver.py 生成的完美下法表，命中时直接查表落子
+        self.table = PerfectPlayTable(table_path) if table_path else None
+        # 可选：落子缓存（cache_size 个局面的 LRU，cache_path 为持久化文件）和开局库
+        self.cache = None
+        if cache_size or cache_path or book_path:
+            self.cache = MoveCache(self.rules, cache_size or 4096, cache_path, book_path)
+        # 搜索图（兼作置换表），跨回合保留以复用搜索结果
+        self.tree = self.new_tree()
+
+    def new_tree(self):
+        return SearchTree(self.rules, bool(self.rave), bool(self.puct))
+
+    def reset(self):
+        """丢弃保留的搜索树（新的一局开始时调用）"""
+        self.tree = self.new_tree()
+        if self.time_manager is not None:
+            self.time_manager.new_game()
+
+    def close(self):
+        """关闭并行搜索的进程池，并保存落子缓存"""
+        if self.cache is not None:
+            self.cache.save()
+        self.stop_pool()
+
+    def stop_pool(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def reuse_tree(self, state):
+        """保留从 state 出发仍可到达的节点，其余丢弃；没有可复用的节点时清空"""
+        key, _ = canonical_key(state)
+        root = self.tree.index.get(key)
+        if root is None:
+            self.tree = self.new_tree()
+        else:
+            self.tree = self.tree.compact(root)
+
+    def get_node(self, state):
+        """取出（或新建）state 所对应的节点，返回 (节点编号, 归一化所用的对称变换)"""
+        key, sym = canonical_key(state)
+        node = self.tree.index.get(key)
+        if node is None:
+            # 有一方连成一线，或棋子不消失时棋盘已下满，均为终局
+            winner = state.winner()
+            # 已连成一线：进入该节点的一方获胜；行棋方下一手就能连成一线：进入该节点的一方必败
+            proven = 1 if winner is not None else -2 if winning_cells(state, state.to_move) else 0
+            node = self.tree.add_node(key, winner is not None or not state.empty(), proven)
+        return node, sym
+
+    def get_legal_actions(self, state):
+        return cells_of(state.empty())
+
+    def winning_cells(self, state, player):
+        """player 下一手可以直接连成一线的空位掩码"""
+        return winning_cells(state, player)
 
     # 防御性检查方法
-    def find_urgent_actions(self, game_state):
-        """优先处理必须防御的位置"""
-        board, pieces = game_state
-        urgent_actions = []
-        
-        # 检查所有空位：如果玩家下这里会立即获胜吗？
-        for i in range(3):
-            for j in range(3):
-                if board[i][j] is None:
-                    # 模拟玩家下这里
-                    temp_board = deepcopy(board)
-                    temp_board[i][j] = 'X'
-                    if self.check_win(temp_board, 'X'):
-                        urgent_actions.append((i, j))
-        
-        return urgent_actions
-
-    def selection(self, node):
-        while node.untried_actions == [] and node.children != []:
-            node = max(node.children, key=lambda x: x.ucb_score())
-        return node
+    def find_urgent_actions(self, state):
+        """优先处理必须防御的位置：对手下一手能直接获胜的空位"""
+        return cells_of(self.winning_cells(state, 1 - state.to_move))
 
-    def expansion(self, node):
-        if node.untried_actions is None:
-            node.untried_actions = self.get_legal_actions(node.game_state)
-            
-        if node.untried_actions:
-            # 修正：确保urgent动作存在于未尝试列表中
-            urgent = [a for a in self.find_urgent_actions(node.game_state) 
-                    if a in node.untried_actions]
-            
-            if urgent:
-                action = random.choice(urgent)
+    def find_winning_move(self, state, player):
+        """寻找指定玩家的必胜位置"""
+        cells = self.winning_cells(state, player)
+        return lowest_cell(cells) if cells else None
+
+    def best_edge(self, node, exploration=1.5):
+        """UCB 分数最高的出边"""
+        tree = self.tree
+        visits = tree.visits
+        wins = tree.wins
+        edge_child = tree.edge_child
+        proven = tree.proven
+        first = tree.first_edge[node]
+        scale = exploration * math.sqrt(math.log(max(visits[node], 1)))
+        sqrt = math.sqrt
+        best, best_score = first, -math.inf
+        for e in range(first, first + tree.edge_count[node]):
+            child = edge_child[e]
+            if proven[child] < 0:
+                continue  # 已证明这一手必败，不再搜索
+            n = visits[child]
+            if n == 0:
+                return e
+            score = wins[child] / n + scale / sqrt(n)
+            if score > best_score:
+                best, best_score = e, score
+        return best
+
+    def rave_edge(self, node, exploration=1.5):
+        """RAVE 模式下分数最高的出边：子节点胜率与出边的 AMAF 胜率按 β 混合后加上 UCB 探索项"""
+        tree = self.tree
+        visits = tree.visits
+        wins = tree.wins
+        edge_child = tree.edge_child
+        amaf_visits = tree.amaf_visits
+        amaf_wins = tree.amaf_wins
+        proven = tree.proven
+        first = tree.first_edge[node]
+        scale = exploration * math.sqrt(math.log(max(visits[node], 1)))
+        sqrt = math.sqrt
+        k = self.rave
+        best, best_score = first, -math.inf
+        for e in range(first, first + tree.edge_count[node]):
+            child = edge_child[e]
+            if proven[child] < 0:
+                continue
+            n = visits[child]
+            if n == 0:
+                return e
+            value = wins[child] / n
+            m = amaf_visits[e]
+            if m:
+                beta = sqrt(k / (3 * n + k))
+                value = (1 - beta) * value + beta * amaf_wins[e] / m
+            score = value + scale / sqrt(n)
+            if score > best_score:
+                best, best_score = e, score
+        return best
+
+    def puct_edge(self, node):
+        """PUCT 分数最高的出边，未展开的出边按 Q = 0 参与比较"""
+        tree = self.tree
+        visits = tree.visits
+        wins = tree.wins
+        edge_child = tree.edge_child
+        edge_prior = tree.edge_prior
+        proven = tree.proven
+        first = tree.first_edge[node]
+        # √N 对所有出边相同，每次选择只算一次
+        scale = self.puct * math.sqrt(visits[node])
+        best, best_score = first, -math.inf
+        for e in range(first, first + tree.edge_count[node]):
+            child = edge_child[e]
+            if child < 0:
+                score = scale * edge_prior[e]
+            elif proven[child] < 0:
+                continue
             else:
-                action = random.choice(node.untried_actions)
-            
-            try:
-                node.untried_actions.remove(action)
-            except ValueError:
-                # 防御性异常处理
-                print(f"Warning: Tried to remove invalid action {action}")
-                return node
-                
-            new_state = self.simulate_move(node.game_state, action)
-            child = Node(new_state, parent=node)
-            node.children.append(child)
-            return child
-        return node
+                n = visits[child]
+                score = (wins[child] / n if n else 0.0) + scale * edge_prior[e] / (1 + n)
+            if score > best_score:
+                best, best_score = e, score
+        return best
+
+    def selection(self, root, state, sym, moves=None, syms=None):
+        """沿 UCB 最大的边下降，同时在 state 上落子还原局面；遇到已证明胜负的节点即停止
+
+        sym 为 state 到当前节点归一化局面的对称变换。返回 (节点路径, 末端节点的 sym,
+        是否因为将要回到路径上已有的局面而停止)。
+        RAVE 模式下 moves / syms 依次记下实际落子和落子前所在节点的 sym。
+        PUCT 模式下不必等所有出边展开，选中未展开的出边时停下，由 expansion 展开它。
+        """
+        tree = self.tree
+        best_edge = self.puct_edge if self.puct else self.rave_edge if self.rave else self.best_edge
+        proven = tree.proven
+        path = [root]
+        node = root
+        repeated = False
+        while (not tree.terminal[node] and not proven[node] and tree.first_edge[node] >= 0
+               and (self.puct or tree.untried[node] == 0)):
+            e = best_edge(node)
+            child = tree.edge_child[e]
+            if child < 0:
+                break
+            if child in path:
+                # 棋子消失会让局面循环出现，选中的落子回到路径上已有的局面时按和棋计
+                repeated = True
+                break
+            cell = self.rules.inverse_symmetries[sym][tree.edge_action[e]]
+            if moves is not None:
+                moves.append(cell)
+                syms.append(sym)
+            state.apply(cell)
+            sym = self.rules.sym_compose[tree.edge_sym[e]][sym]
+            path.append(child)
+            node = child
+        return path, sym, repeated
+
+    def unique_actions(self, state):
+        """合法落子中去掉对称后重复的那些（如空棋盘只剩中心、角、边三种）
+
+        返回 [(实际落子, 子局面的对称变换)]。
+        """
+        seen = set()
+        actions = []
+        for action in self.get_legal_actions(state):
+            state.apply(action)
+            key, child_sym = canonical_key(state)
+            state.undo()
+            if key not in seen:
+                seen.add(key)
+                actions.append((action, child_sym))
+        return actions
 
-    def simulation(self, game_state):
-        state = deepcopy(game_state)
+    def expansion(self, node, state, sym, moves=None, syms=None):
+        """展开 node 的一条未尝试的出边并在 state 上落子，返回 (子节点, 子节点的 sym)
+
+        node 为终局、已证明胜负或已完全展开时返回 (None, sym)。moves / syms 同 selection。
+        """
+        tree = self.tree
+        rules = self.rules
+        if tree.terminal[node] or tree.proven[node]:
+            return None, sym
+        inverse = rules.sym_inverse[sym]
+        if tree.first_edge[node] < 0:
+            actions = self.unique_actions(state)
+            priors = self.move_priors(state, [a for a, _ in actions]) if self.puct else None
+            tree.add_edges(node, [rules.symmetries[sym][a] for a, _ in actions],
+                           [rules.sym_compose[child_sym][inverse] for _, child_sym in actions],
+                           priors)
+
+        if tree.untried[node] == 0:
+            return None, sym
+
+        to_actual = rules.inverse_symmetries[sym]
+        untried = [e for e in tree.edges(node) if tree.edge_child[e] < 0]
+        urgent_actions = self.find_urgent_actions(state)
+        urgent = [e for e in untried if to_actual[tree.edge_action[e]] in urgent_actions]
+        if self.puct:
+            # 未展开的出边 Q 都按 0 计，PUCT 分数最高的就是先验最大的
+            e = max(urgent or untried, key=tree.edge_prior.__getitem__)
+        else:
+            e = random.choice(urgent) if urgent else random.choice(untried)
+
+        cell = to_actual[tree.edge_action[e]]
+        if moves is not None:
+            moves.append(cell)
+            syms.append(sym)
+        state.apply(cell)
+        child, child_sym = self.get_node(state)
+        tree.edge_child[e] = child
+        tree.untried[node] -= 1
+        return child, child_sym
+
+    def simulation(self, state, moves=None):
+        """从 state 开始按启发式策略快速对弈，返回 O 视角的结果
+
+        moves 不为 None 时把模拟中的落子依次追加进去（RAVE 使用）。
+        """
+        if self.batch is not None:
+            self.rollout_steps = None
+            return self.batch.mean_result(state)
+        # 直接在 state 上落子，结束前全部撤销，循环中不再复制局面
+        cell_list = self.rules.cell_list
+        # 棋子数达到上限之前局面不会重复，之后记录见过的局面（含落子顺序和行棋方）
+        full = self.rules.max_pieces
+        seen = set()
+        result = 0
         steps = 0
-        while steps < 20:
-            actions = self.get_legal_actions(state)
-            if not actions:
-                return 0
-                
-            # 防御优先策略
-            urgent = self.find_urgent_moves(state)
-            if urgent:
-                action = random.choice(urgent)
-                state = self.simulate_move(state, action)
-                steps += 1
-                continue
-                
-            # 进攻策略
-            player = 'O' if (len(state[1]) + steps) % 2 == 1 else 'X'
-            win_move = self.find_winning_move(state, player)
-            if win_move:
-                state = self.simulate_move(state, win_move)
-                return 1 if player == 'O' else -1
-                
-            # 启发式选择
-            action = self.heuristic_choice(state, actions)
-            state = self.simulate_move(state, action)
+        while steps < MAX_ROLLOUT_STEPS:
+            player = state.to_move
+            # 进攻策略：能赢直接结束
+            if winning_cells(state, player):
+                result = SIGN[player]
+                break
+            empty = state.empty()
+            if not empty:
+                break  # 棋子不消失时棋盘下满，和棋
+            if state.count == full:
+                key = state_key(state)
+                if key in seen:
+                    break  # 局面重复，双方都没有打破循环，和棋
+                seen.add(key)
+            cell = self.heuristic_choice(state, cell_list[empty])
+            if moves is not None:
+                moves.append(cell)
+            state.apply(cell)
             steps += 1
-        return 0
-
-    # 防御性检查
-    def find_urgent_moves(self, state):
-        """寻找需要立即防御的位置"""
-        board, _ = state
-        opponent = 'X'
-        urgent = []
-        
-        # 检查所有空位
-        for i in range(3):
-            for j in range(3):
-                if board[i][j] is None:
-                    temp = deepcopy(board)
-                    temp[i][j] = opponent
-                    if self.check_win(temp, opponent):
-                        urgent.append((i, j))
-        return urgent
-
-    def find_winning_move(self, state, player):
-        """寻找指定玩家的必胜位置"""
-        board, _ = state
-        for i in range(3):
-            for j in range(3):
-                if board[i][j] is None:
-                    temp = deepcopy(board)
-                    temp[i][j] = player
-                    if self.check_win(temp, player):
-                        return (i, j)
-        return None
+        for _ in range(steps):
+            state.undo()
+        self.rollout_steps = steps
+        return result
 
     def heuristic_choice(self, state, actions):
-        board, _ = state
-        player = 'O' if len(state[1]) % 2 == 1 else 'X'
-        
+        player = state.to_move
+        opponent = 1 - player
+
+        # 进攻：直接获胜
+        win = self.winning_cells(state, player)
+        if win:
+            return lowest_cell(win)
+
         # 防御：阻止对手的潜在胜利
-        opponent = 'X' if player == 'O' else 'O'
-        for action in actions:
-            temp = deepcopy(board)
-            temp[action[0]][action[1]] = opponent
-            if self.check_win(temp, opponent):
-                return action
-                
-        # 进攻：寻找潜在胜利路径
-        for action in actions:
-            temp = deepcopy(board)
-            temp[action[0]][action[1]] = player
-            if self.check_win(temp, player):
-                return action
-                
+        block = self.winning_cells(state, opponent)
+        if block:
+            return lowest_cell(block)
+
         # 增强的潜在威胁检测
-        threat_actions = []
-        for action in actions:
-            if self.is_potential_threat(board, action, opponent):
-                threat_actions.append(action)
-        if threat_actions:
-            return random.choice(threat_actions)
-            
+        empty = state.empty()
+        threat = threat_cells(state, opponent) & empty
+        if threat:
+            return random.choice(self.rules.cell_list[threat])
+
         # 原启发式策略
-        if (1,1) in actions:
-            return (1,1)
-        corners = [(0,0), (0,2), (2,0), (2,2)]
-        for corner in corners:
-            if corner in actions:
-                return corner
+        rules = self.rules
+        if empty >> rules.center & 1:
+            return rules.center
+        if empty & rules.corner_mask:
+            return lowest_cell(empty & rules.corner_mask)
         return random.choice(actions)
 
-    def is_potential_threat(self, board, action, opponent):
-        """检查该位置是否可能形成双重威胁"""
-        i, j = action
-        # 检查行
-        row = board[i]
-        if row.count(opponent) == 1 and row.count(None) == 2:
-            return True
-        # 检查列
-        col = [board[x][j] for x in range(3)]
-        if col.count(opponent) == 1 and col.count(None) == 2:
-            return True
-        # 检查对角线
-        if i == j:
-            diag = [board[x][x] for x in range(3)]
-            if diag.count(opponent) == 1 and diag.count(None) == 2:
-                return True
-        if i + j == 2:
-            diag = [board[x][2-x] for x in range(3)]
-            if diag.count(opponent) == 1 and diag.count(None) == 2:
-                return True
-        return False
-
-    def backpropagation(self, node, result):
-        while node is not None:
-            node.visits += 1
-            node.wins += result
-            node = node.parent
-
-    def check_win(self, board, player):
-        for i in range(3):
-            if all(board[i][j] == player for j in range(3)) or \
-               all(board[j][i] == player for j in range(3)):
-                return True
-        if all(board[i][i] == player for i in range(3)) or \
-           all(board[i][2-i] == player for i in range(3)):
-            return True
-        return False
+    def move_priors(self, state, actions):
+        """PUCT 的先验概率：按 heuristic_choice 的判断（获胜、阻挡、双威胁、提前封堵、
+        中心、角）给各落子权重，归一化后返回，与 actions 一一对应"""
+        rules = self.rules
+        player = state.to_move
+        opponent = 1 - player
+        win = self.winning_cells(state, player)
+        block = self.winning_cells(state, opponent)
+        threat = threat_cells(state, opponent)
+        weights = []
+        for action in actions:
+            if win >> action & 1:
+                weight = PRIOR_WIN
+            elif block >> action & 1:
+                weight = PRIOR_BLOCK
+            else:
+                state.apply(action)
+                fork = rules.popcount[self.winning_cells(state, player)] >= 2
+                state.undo()
+                if fork:
+                    weight = PRIOR_FORK
+                elif threat >> action & 1:
+                    weight = PRIOR_THREAT
+                elif action == rules.center:
+                    weight = PRIOR_CENTER
+                elif rules.corner_mask >> action & 1:
+                    weight = PRIOR_CORNER
+                else:
+                    weight = 1.0
+            weights.append(weight)
+        total = sum(weights)
+        return [w / total for w in weights]
+
+    def backpropagation(self, path, mover, result):
+        """mover 为进入 path[0] 的落子方，沿路径交替"""
+        visits = self.tree.visits
+        wins = self.tree.wins
+        for node in path:
+            visits[node] += 1
+            wins[node] += result * SIGN[mover]
+            mover ^= 1
+
+    def propagate_proof(self, path):
+        """path 末端的节点已证明胜负时沿路径向上传播
+
+        行棋方有一手必胜时，进入该节点的一方必败；所有出边都已展开且都必败时，
+        进入该节点的一方必胜。胜负未定的节点停止传播。
+        """
+        tree = self.tree
+        proven = tree.proven
+        edge_child = tree.edge_child
+        for i in range(len(path) - 2, -1, -1):
+            node = path[i]
+            value = proven[path[i + 1]]
+            if value > 0:
+                proven[node] = -(value + 1)
+            elif value < 0 and tree.untried[node] == 0:
+                longest = 0
+                for e in tree.edges(node):
+                    child_value = proven[edge_child[e]]
+                    if child_value >= 0:
+                        return
+                    longest = max(longest, -child_value)
+                proven[node] = longest + 1
+            else:
+                return
+
+    def best_child_edge(self, node):
+        """node 处最好的出边：已证明必胜的取最快的，否则取未证明必败中访问次数最多的；
+        全都必败时取最能拖延的。没有展开过的出边时返回 -1"""
+        tree = self.tree
+        proven = tree.proven
+        visits = tree.visits
+        best, best_key = -1, None
+        for e in tree.edges(node):
+            child = tree.edge_child[e]
+            if child < 0:
+                continue
+            value = proven[child]
+            if value > 0:
+                key = (2, -value)
+            elif value < 0:
+                key = (0, -value)
+            else:
+                key = (1, visits[child])
+            if best_key is None or key > best_key:
+                best, best_key = e, key
+        return best
+
+    def best_move(self, root, sym):
+        """根节点最好的落子（实际棋盘上的格子），还没有展开过任何出边时返回 None"""
+        e = self.best_child_edge(root)
+        return self.rules.inverse_symmetries[sym][self.tree.edge_action[e]] if e >= 0 else None
+
+    def proven_move(self, root, sym):
+        """根节点已证明行棋方必胜时返回最快取胜的落子（实际棋盘上的格子），否则返回 None"""
+        if self.tree.proven[root] >= 0:
+            return None
+        return self.best_move(root, sym)
+
+    def principal_variation(self, root, sym, max_length=PV_LENGTH):
+        """从根节点沿最好的出边走下去的落子序列 [(row, col), ...]"""
+        tree = self.tree
+        rules = self.rules
+        pv = []
+        node = root
+        seen = {root}
+        while len(pv) < max_length:
+            e = self.best_child_edge(node)
+            if e < 0:
+                break
+            pv.append(divmod(rules.inverse_symmetries[sym][tree.edge_action[e]], rules.size))
+            sym = rules.sym_compose[tree.edge_sym[e]][sym]
+            node = tree.edge_child[e]
+            if node in seen:
+                break  # 棋子消失导致局面循环
+            seen.add(node)
+        return pv
+
+    def candidate_visits(self, root):
+        """根节点各候选落子的访问次数；已证明必败的落子不算候选，尚未展开的按 0 次计"""
+        tree = self.tree
+        proven = tree.proven
+        visits = tree.visits
+        counts = []
+        for e in tree.edges(root):
+            child = tree.edge_child[e]
+            if child < 0:
+                counts.append(0)
+            elif proven[child] >= 0:
+                counts.append(visits[child])
+        return counts
+
+    def visit_lead(self, root):
+        """访问次数最多的候选落子领先第二名多少次，只剩一个候选时返回 inf"""
+        counts = self.candidate_visits(root)
+        if len(counts) == 1:
+            return math.inf
+        first = second = 0
+        for n in counts:
+            if n > first:
+                first, second = n, first
+            elif n > second:
+                second = n
+        return first - second
+
+    def report_progress(self, root, sym, iterations, elapsed):
+        pv = self.principal_variation(root, sym)
+        if pv:
+            self.progress(pv[0], pv, iterations, elapsed)
+
+    def update_amaf(self, path, syms, moves, player, result):
+        """AMAF 更新：path[j] 的出边若在第 j 步及以后被同一方下过，就按本次结果计一次
+
+        moves 为本次迭代从根开始的全部实际落子，第 0 步由 player 走，之后交替。
+        """
+        tree = self.tree
+        amaf_visits = tree.amaf_visits
+        amaf_wins = tree.amaf_wins
+        edge_action = tree.edge_action
+        # played[i]：第 i 步及之后与第 i 步同一方的落子掩码
+        played = [0] * (len(moves) + 2)
+        for i in range(len(moves) - 1, -1, -1):
+            played[i] = played[i + 2] | 1 << moves[i]
+        inverse = self.rules.inverse_symmetries
+        for j in range(min(len(path), len(syms))):
+            later = played[j]
+            to_actual = inverse[syms[j]]
+            reward = result * SIGN[player ^ (j & 1)]
+            for e in tree.edges(path[j]):
+                if later >> to_actual[edge_action[e]] & 1:
+                    amaf_visits[e] += 1
+                    amaf_wins[e] += reward
 
     def make_move(self, game_state):
-        start_time = time.time()
-        board, pieces = game_state
-        
-        # 防御优先：立即阻止玩家的必胜棋（增加有效性检查）
-        urgent_actions = [a for a in self.find_urgent_actions(game_state)
-                        if board[a[0]][a[1]] is None]
-        if urgent_actions:
-            return random.choice(urgent_actions)
-        
+        start_time = time.perf_counter()
+        self.last_iterations = 0
+        stats = self.last_stats = SearchStats() if self.profile else None
+        state = BitState.from_game_state(game_state, self.rules)
+        budget = self.time_manager.allocate(state) if self.time_manager is not None else None
+        cell, reason = self.choose_move(state, start_time, stats, budget)
+        if self.time_manager is not None:
+            self.time_manager.spend(time.perf_counter() - start_time)
+        move = divmod(cell, self.rules.size)
+        if stats is not None:
+            stats.stop_reason = stats.stop_reason or reason
+            stats.elapsed = time.perf_counter() - start_time
+            stats.move = move
+        return move
+
+    def choose_move(self, state, start_time, stats=None, budget=None):
+        """返回 (落子格子, 结束原因)；若经过搜索，结束原因由 search 写入 stats
+
+        start_time 取自 time.perf_counter()。budget 为时间管理器分配的
+        (目标时间, 上限时间)，为 None 时使用 timeout。
+        """
+        if self.table is not None:
+            cell = self.table.best_move(state)
+            if cell is not None:
+                return cell, STOP_TABLE
+
         # 进攻优先：寻找自己的必胜棋
-        for i in range(3):
-            for j in range(3):
-                if board[i][j] is None:
-                    temp = deepcopy(board)
-                    temp[i][j] = 'O'
-                    if self.check_win(temp, 'O'):
-                        return (i, j)
-        
-        root = Node(game_state)
-        iterations = 0
-        
-        while time.time() - start_time < self.timeout and iterations < self.iterations:
-            node = self.selection(root)
-            node = self.expansion(node)
-            if node.game_state != root.game_state:
-                result = self.simulation(node.game_state)
-                self.backpropagation(node, result)
-            iterations += 1
-            
-        if not root.children:
-            return random.choice(self.get_legal_actions(game_state))
-            
-        best_child = max(root.children, key=lambda x: x.visits)
-        for action in self.get_legal_actions(game_state):
-            temp_state = self.simulate_move(game_state, action)
-            if temp_state[0] == best_child.game_state[0]:
-                return action
-        return random.choice(self.get_legal_actions(game_state))
\ No newline at end of file
+        win = self.find_winning_move(state, state.to_move)
+        if win is not None:
+            return win, STOP_WIN
+
+        # 防御优先：立即阻止对手的必胜棋
+        urgent_actions = self.find_urgent_actions(state)
+        if urgent_actions:
+            return random.choice(urgent_actions), STOP_BLOCK
+
+        # 只有一个空位时不必搜索
+        legal = self.get_legal_actions(state)
+        if len(legal) == 1:
+            return legal[0], STOP_FORCED
+
+        if self.cache is not None:
+            hit = self.cache.lookup(state)
+            if hit is not None:
+                return hit[0], STOP_CACHE
+
+        target, limit = budget or (None, self.timeout)
+        spent = time.perf_counter() - start_time
+        if target is not None:
+            target -= spent
+        pvs = None
+        if self.workers > 1:
+            root_stats, move, pvs = self.parallel_search(state, limit - spent, target)
+            reason = STOP_PARALLEL
+            if stats is not None:
+                stats.iterations = self.last_iterations
+        else:
+            root, sym = self.search(state, self.iterations, limit - spent, stats, target)
+            root_stats = self.root_statistics(root, sym)
+            move = self.best_move(root, sym)
+            reason = None
+
+        if not root_stats:
+            return random.choice(self.get_legal_actions(state)), reason
+
+        if move is None:
+            move = max(root_stats, key=lambda a: root_stats[a][0])
+        if pvs is not None and self.progress is not None:
+            # 并行模式下只在搜索结束后汇报一次：取以选定落子开头的某个进程的主要变例
+            first = divmod(move, self.rules.size)
+            pv = next((pv for pv in pvs if pv and pv[0] == first), [first])
+            self.progress(first, pv, self.last_iterations, time.perf_counter() - start_time)
+        if self.cache is not None and not self.stop_event.is_set():
+            self.cache.store(state, move, {a: visits for a, (visits, _) in root_stats.items()})
+        return move, reason
+
+    def ponder(self, game_state):
+        """对手思考期间从 game_state（轮到对手走）继续搜索，直到 stop_event 被置位
+
+        搜索结果保存在置换表中，对手落子后 make_move 会从对应的子树继续。
+        并行模式下 make_move 不使用本进程的搜索树，加载了完美下法表时 make_move
+        直接查表，这两种情况都不做后台思考。
+        """
+        if self.workers > 1 or self.table is not None:
+            return
+        state = BitState.from_game_state(game_state, self.rules)
+        if state.winner() is not None or not state.empty():
+            return
+        self.search(state, math.inf, math.inf)
+
+    def search(self, state, iterations, timeout, stats=None, target=None):
+        """从 state 开始搜索，返回 (根节点, 根局面的对称变换编号)
+
+        传入 stats 时记录各阶段耗时等统计；为 None 时每次迭代只多几次判断。
+        给出 target（秒）时，用时超过 target 且根节点的选择已经明朗就提前结束。
+        设置了 progress 回调时每隔 PROGRESS_INTERVAL 秒及搜索结束时汇报一次。
+        """
+        clock = time.perf_counter
+        start_time = clock()
+        # 上一回合的搜索树中包含人类回应后的局面，从那里继续搜索
+        self.reuse_tree(state)
+        root, root_sym = self.get_node(state)
+        root_mover = 1 - state.to_move
+        initial_size = len(self.tree)
+        count = 0
+        decided = settled = False
+        next_report = start_time + PROGRESS_INTERVAL
+
+        # 整个搜索只使用一份局面：下降时 apply，每次迭代结束后 undo 回到根局面
+        current = state.copy()
+        stop_event = self.stop_event
+        proven = self.tree.proven
+        moves = syms = None
+        # 根节点的胜负一旦得到证明，继续搜索也不会改变选择
+        while (clock() - start_time < timeout and count < iterations
+               and not stop_event.is_set() and not proven[root]):
+            if stats is not None:
+                t0 = clock()
+            if self.rave:
+                moves, syms = [], []
+            path, sym, repeated = self.selection(root, current, root_sym, moves, syms)
+            if stats is not None:
+                t1 = clock()
+            if not repeated:
+                node, sym = self.expansion(path[-1], current, sym, moves, syms)
+                if node in path:
+                    repeated = True  # 新展开的落子回到了路径上已有的局面
+                elif node is not None:
+                    path.append(node)
+            if stats is not None:
+                t2 = t3 = clock()
+            steps = None
+            if len(path) > 1:
+                leaf = 0 if repeated else proven[path[-1]]
+                if repeated:
+                    result = 0  # 局面循环，按和棋计，不必模拟
+                elif leaf:
+                    # 已证明胜负（含已连成一线）的局面不必模拟
+                    result = SIGN[1 - current.to_move] if leaf > 0 else SIGN[current.to_move]
+                else:
+                    result = self.simulation(current, moves)
+                    steps = self.rollout_steps
+                if stats is not None:
+                    t3 = clock()
+                self.backpropagation(path, root_mover, result)
+                if leaf:
+                    self.propagate_proof(path)
+                if self.rave:
+                    self.update_amaf(path, syms, moves, state.to_move, result)
+            while current.history:
+                current.undo()
+            if stats is not None:
+                stats.record_iteration((t1 - t0, t2 - t1, t3 - t2, clock() - t3), len(path), steps)
+            count += 1
+            if count % CHECK_INTERVAL == 0:
+                now = clock()
+                elapsed = now - start_time
+                if self.progress is not None and now >= next_report:
+                    self.report_progress(root, root_sym, count, elapsed)
+                    next_report = now + PROGRESS_INTERVAL
+                if self.early_stop:
+                    # 剩余迭代次数取次数上限和按目前速度在剩余时间内能完成的次数中较小的
+                    remaining = min(iterations - count, (timeout - elapsed) * count / elapsed)
+                    if self.visit_lead(root) > remaining:
+                        decided = True
+                        break
+                if target is not None and elapsed >= target and TimeManager.settled(self.candidate_visits(root)):
+                    settled = True
+                    break
+        self.last_iterations += count
+        if self.progress is not None:
+            self.report_progress(root, root_sym, count, clock() - start_time)
+
+        if stats is not None:
+            if stop_event.is_set():
+                stats.stop_reason = STOP_CANCELLED
+            elif proven[root]:
+                stats.stop_reason = STOP_PROVEN
+            elif decided:
+                stats.stop_reason = STOP_DECIDED
+            elif settled:
+                stats.stop_reason = STOP_SETTLED
+            elif count >= iterations:
+                stats.stop_reason = STOP_ITERATIONS
+            else:
+                stats.stop_reason = STOP_TIMEOUT
+            stats.nodes_allocated += len(self.tree) - initial_size
+            stats.tree_size = len(self.tree)
+        return root, root_sym
+
+    def root_statistics(self, root, sym):
+        """根节点各落子的 {实际棋盘上的格子: (访问次数, 胜场)}"""
+        # 根节点的落子以归一化后的坐标表示，需要变换回实际棋盘
+        tree = self.tree
+        inverse = self.rules.inverse_symmetries[sym]
+        stats = {}
+        for e in tree.edges(root):
+            child = tree.edge_child[e]
+            if child >= 0:
+                stats[inverse[tree.edge_action[e]]] = (tree.visits[child], tree.wins[child])
+        return stats
+
+    def parallel_search(self, state, timeout, target=None):
+        """在进程池中以不同随机种子并行搜索，合并各落子的访问次数和胜场
+
+        timeout / target 同 search，每个进程各自按它们结束。返回 (合并后的根节点统计,
+        某个进程证明的必胜落子或 None, 各进程的主要变例)。stop_event 被置位时不等各进程
+        用完时间，直接终止进程池（下一步重新创建）并返回 ({}, None, [])。
+        """
+        if self.pool is None:
+            # 进程池在多次落子之间保持常驻，避免每步重复启动进程
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                             initargs=(self.rollout_batch, self.rules, self.rave,
+                                                       self.puct, self.early_stop))
+        tasks = [(state, self.worker_iterations, timeout, target, random.getrandbits(32))
+                 for _ in range(self.workers)]
+        pending = self.pool.map_async(_search_worker, tasks, chunksize=1)
+        while not pending.ready():
+            if self.stop_event.is_set():
+                self.stop_pool()
+                return {}, None, []
+            pending.wait(POOL_POLL)
+        merged = {}
+        proven_move = None
+        pvs = []
+        for stats, count, move, pv in pending.get():
+            self.last_iterations += count
+            pvs.append(pv)
+            proven_move = proven_move if move is None else move
+            for action, (visits, wins) in stats.items():
+                total_visits, total_wins = merged.get(action, (0, 0))
+                merged[action] = (total_visits + visits, total_wins + wins)
+        return merged, proven_move, pvs
+
+
+def _init_worker(rollout_batch, rules, rave, puct, early_stop):
+    global _worker_ai
+    _worker_ai = MCTS(rollout_batch=rollout_batch, rules=rules, rave=rave, puct=puct,
+                      early_stop=early_stop)
+
+
+def _search_worker(task):
+    state, iterations, timeout, target, seed = task
+    random.seed(seed)
+    _worker_ai.last_iterations = 0
+    root, sym = _worker_ai.search(state, iterations, timeout, target=target)
+    return (_worker_ai.root_statistics(root, sym), _worker_ai.last_iterations,
+            _worker_ai.proven_move(root, sym), _worker_ai.principal_variation(root, sym))
@@ -0,0 +1,254 @@
+"""本地落子服务：在 localhost 上通过 HTTP 同时为多局对弈提供 AI 落子
+
+    python move_service.py --workers 4 --port 8765
+
+POST /move，请求体为 JSON：
+    {"board": [[null, "X", null], ...], "pieces": [[0, 1, "X"], ...],
+     "timeout": 0.5, "iterations": 2000}
+board、pieces 即界面传给 make_move 的 (board, piece_positions)；timeout（秒，包括
+排队时间）和 iterations 可选，超过服务端上限时按上限计。返回：
+    {"move": [row, col], "iterations": 1234, "queued": 0.001, "elapsed": 0.31}
+GET /stats 返回规则、已完成和被拒绝的请求数以及延迟分位数。
+
+后台是常驻的进程池，每个进程启动时创建一次引擎（生成规则数据、载入完美下法表），
+之后一直复用；--engine 选择引擎，写法见 engines.py，例如 --engine alphabeta。正在处理和排队的请求超过 workers + queue_size 时立即返回 503，
+由客户端稍后重试，而不是无限排队。压测见 load_test.py。
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from engines import create_engine
+from game_rules import DEFAULT_RULES, PLAYERS, BitState, get_rules
+from solver import TABLE_PATH
+
+MIN_SEARCH_TIME = 0.01  # 预算在排队中耗尽时至少还搜索这么久（秒），避免随机落子
+
+_service_ai = None  # 每个工作进程各自持有的搜索器
+
+
+class ServiceBusy(Exception):
+    """排队的请求已满"""
+
+
+class BadRequest(Exception):
+    """请求内容不合法"""
+
+
+def percentile(values, q):
+    """values 已排序，q 取 0 到 100"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def parse_game_state(data, rules):
+    """检查并转换请求中的 board 和 pieces，返回 (board, piece_positions)"""
+    board = data.get('board')
+    pieces = data.get('pieces')
+    size = rules.size
+    if (not isinstance(board, list) or len(board) != size
+            or any(not isinstance(row, list) or len(row) != size for row in board)):
+        raise BadRequest(f"board 必须是 {size}×{size} 的列表")
+    if any(cell not in (None, *PLAYERS) for row in board for cell in row):
+        raise BadRequest("board 中只能是 null、\"X\" 或 \"O\"")
+    if not isinstance(pieces, list) or len(pieces) > rules.max_pieces:
+        raise BadRequest(f"pieces 必须是不超过 {rules.max_pieces} 项的列表")
+    positions = []
+    for item in pieces:
+        if (not isinstance(item, list) or len(item) != 3 or item[2] not in PLAYERS
+                or not all(isinstance(v, int) and 0 <= v < size for v in item[:2])):
+            raise BadRequest("pieces 中每一项必须是 [row, col, \"X\" 或 \"O\"]")
+        row, col, player = item
+        if board[row][col] != player:
+            raise BadRequest(f"pieces 与 board 不一致：({row}, {col})")
+        positions.append((row, col, player))
+    if sum(cell is not None for row in board for cell in row) != len(positions):
+        raise BadRequest("board 上的棋子数与 pieces 不一致")
+    state = BitState.from_game_state((board, positions), rules)
+    if state.winner() is not None or not state.empty():
+        raise BadRequest("对局已经结束")
+    return board, positions
+
+
+class MoveService:
+    """进程池 + 有界排队；submit() 在调用线程中等待结果"""
+
+    def __init__(self, workers=None, queue_size=None, max_timeout=3.0, max_iterations=3000,
+                 rules=None, table_path=None, engine='mcts'):
+        self.rules = rules or DEFAULT_RULES
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + (self.workers * 2 if queue_size is None else queue_size)
+        self.max_timeout = max_timeout
+        self.max_iterations = max_iterations
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_service_worker,
+                                            initargs=(self.rules, table_path, engine))
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=10000)  # 最近请求的总耗时（秒）
+
+    def warm_up(self):
+        """让每个工作进程都启动并完成初始化"""
+        state = BitState(self.rules).to_game_state()
+        futures = [self.executor.submit(_serve_move, (state, 1, time.time(), i))
+                   for i in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, game_state, timeout=None, iterations=None):
+        """为 game_state 搜索落子；排队已满时抛出 ServiceBusy"""
+        with self.lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise ServiceBusy()
+            self.pending += 1
+        start_time = time.time()
+        try:
+            budget = min(timeout or self.max_timeout, self.max_timeout)
+            iterations = min(iterations or self.max_iterations, self.max_iterations)
+            task = (game_state, iterations, start_time + budget, random.getrandbits(32))
+            (row, col), count, started = self.executor.submit(_serve_move, task).result()
+        finally:
+            with self.lock:
+                self.pending -= 1
+        elapsed = time.time() - start_time
+        with self.lock:
+            self.completed += 1
+            self.latencies.append(elapsed)
+        return {'move': [row, col], 'iterations': count,
+                'queued': max(started - start_time, 0.0), 'elapsed': elapsed}
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            result = {'rules': self.rules.params(), 'workers': self.workers,
+                      'capacity': self.capacity, 'pending': self.pending,
+                      'completed': self.completed, 'rejected': self.rejected}
+        for q in (50, 90, 99):
+            result[f'p{q}'] = percentile(latencies, q)
+        return result
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _init_service_worker(rules, table_path, engine):
+    global _service_ai
+    _service_ai = create_engine(engine, rules, defaults={'mcts': {'table_path': table_path}})
+
+
+def _serve_move(task):
+    """在工作进程中执行：剩余预算 = 截止时间 - 当前时间（排队耗掉的时间不再补回）"""
+    game_state, iterations, deadline, seed = task
+    started = time.time()
+    random.seed(seed)
+    if hasattr(_service_ai, 'iterations'):
+        _service_ai.iterations = iterations  # alpha-beta 等引擎只受时间限制
+    _service_ai.timeout = max(deadline - started, MIN_SEARCH_TIME)
+    move = _service_ai.make_move(game_state)
+    return move, _service_ai.last_iterations, started
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None  # 由 make_server 设置
+    quiet = True
+
+    def _reply(self, status, payload, headers=()):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._reply(200, self.service.stats())
+        else:
+            self._reply(404, {'error': '未知的路径'})
+
+    def do_POST(self):
+        if self.path != '/move':
+            self._reply(404, {'error': '未知的路径'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(data, dict):
+                raise BadRequest("请求体必须是 JSON 对象")
+            game_state = parse_game_state(data, self.service.rules)
+            timeout, iterations = data.get('timeout'), data.get('iterations')
+            if (timeout is not None and not (isinstance(timeout, (int, float)) and timeout > 0)
+                    or iterations is not None and not (isinstance(iterations, int) and iterations > 0)):
+                raise BadRequest("timeout 和 iterations 必须是正数")
+            result = self.service.submit(game_state, timeout, iterations)
+        except (ValueError, BadRequest) as e:
+            self._reply(400, {'error': str(e)})
+        except ServiceBusy:
+            self._reply(503, {'error': '服务繁忙，请稍后重试'}, [('Retry-After', '1')])
+        else:
+            self._reply(200, result)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认的监听队列只有 5，并发连接一多就会被内核丢弃并在 1 秒后重连，
+    # 拖长尾延迟；排队与拒绝由 MoveService 负责
+    request_queue_size = 1024
+
+
+def make_server(service, host='127.0.0.1', port=8765, quiet=True):
+    handler = type('Handler', (_Handler,), {'service': service, 'quiet': quiet})
+    return _Server((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 AI 落子服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="工作进程数（默认为 CPU 核数）")
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help="除正在处理的请求外最多排队的请求数（默认为工作进程数的两倍）")
+    parser.add_argument('--max-timeout', type=float, default=3.0, help="每个请求的时间上限（秒）")
+    parser.add_argument('--max-iterations', type=int, default=3000, help="每个请求的迭代次数上限")
+    parser.add_argument('--size', type=int, default=3, help="棋盘边长")
+    parser.add_argument('--win-length', type=int, default=3, help="连成几子获胜")
+    parser.add_argument('--max-pieces', type=int, default=6, help="场上最多棋子数，0 表示棋子不消失")
+    parser.add_argument('--engine', default='mcts', help="AI 引擎及参数，写法见 engines.py")
+    parser.add_argument('--verbose', action='store_true', help="打印每个请求")
+    args = parser.parse_args()
+
+    rules = get_rules(args.size, args.win_length, args.max_pieces or None)
+    use_table = rules == DEFAULT_RULES and os.path.exists(TABLE_PATH)
+    service = MoveService(args.workers, args.queue_size, args.max_timeout, args.max_iterations,
+                          rules, TABLE_PATH if use_table else None, args.engine)
+    service.warm_up()
+    server = make_server(service, args.host, args.port, quiet=not args.verbose)
+    print(f"落子服务已启动：http://{args.host}:{args.port}  {rules}，"
+          f"{service.workers} 个工作进程，最多 {service.capacity} 个请求同时处理或排队")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""落子缓存与开局库
+
+开局阶段的局面在每一局中反复出现，没必要每次都从头搜索。MoveCache 以对称归一化
+后的局面哈希为键，记录搜索选出的落子和根节点各落子的访问次数：
+- 运行中搜索过的局面放在容量有限的 LRU 缓存中，可选保存到文件、下次启动时载入
+- 开局库是离线深度搜索得到的结果，载入后常驻、不会被淘汰
+
+落子和访问次数都以归一化局面的坐标保存，查询时再变换回实际棋盘，所以对称的
+局面共用同一条记录。文件为 JSON：{"rules": [边长, 连线长度, 最多棋子数],
+"entries": [[局面哈希, 落子, [[格子, 访问次数], ...]], ...]}。
+
+生成开局库（前 4 步内所有需要搜索的局面，每个局面搜索 20000 次）：
+    python opening_book.py --plies 4 --iterations 20000
+"""
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+
+from game_rules import BitState, canonical_key, cells_of, get_rules
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.json')
+
+
+class MoveCache:
+    def __init__(self, rules, capacity=4096, path=None, book_path=None):
+        self.rules = rules
+        self.capacity = capacity
+        self.path = path
+        self.book = {}                # 归一化局面哈希 -> (落子, {格子: 访问次数})
+        self.entries = OrderedDict()  # 同上，按最近使用排序
+        self.hits = 0
+        self.misses = 0
+        if book_path is not None:
+            self.book = dict(self._read(book_path))
+        if path is not None and os.path.exists(path):
+            for key, entry in self._read(path):
+                self._insert(key, entry)
+
+    def __len__(self):
+        return len(self.book) + len(self.entries)
+
+    def lookup(self, state):
+        """命中时返回 (实际棋盘上的落子, {实际格子: 访问次数})，否则返回 None"""
+        key, sym = canonical_key(state)
+        entry = self.book.get(key)
+        if entry is None:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        to_actual = self.rules.inverse_symmetries[sym]
+        move, distribution = entry
+        return to_actual[move], {to_actual[cell]: visits for cell, visits in distribution.items()}
+
+    def store(self, state, move, distribution):
+        """记录 state 的落子和 {实际格子: 访问次数}；开局库中已有的局面不覆盖"""
+        key, sym = canonical_key(state)
+        if key in self.book:
+            return
+        to_canonical = self.rules.symmetries[sym]
+        self._insert(key, (to_canonical[move],
+                           {to_canonical[cell]: visits for cell, visits in distribution.items()}))
+
+    def _insert(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def _read(self, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if tuple(data['rules']) != self.rules.params():
+            raise ValueError(f"{path} 是为规则 {data['rules']} 生成的，与当前规则 {self.rules} 不符")
+        return [(key, (move, {cell: visits for cell, visits in distribution}))
+                for key, move, distribution in data['entries']]
+
+    @staticmethod
+    def write(path, rules, entries):
+        data = {'rules': list(rules.params()),
+                'entries': [[key, move, sorted(distribution.items())]
+                            for key, (move, distribution) in entries.items()]}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def save(self, path=None):
+        """把 LRU 缓存（不含开局库）写入文件"""
+        path = path or self.path
+        if path is not None:
+            self.write(path, self.rules, self.entries)
+
+
+def book_positions(rules, plies):
+    """从空棋盘出发 plies 步以内、对称去重后尚未分出胜负的所有局面"""
+    start = BitState(rules)
+    seen = {canonical_key(start)[0]}
+    layer = [start]
+    positions = [start]
+    for _ in range(plies):
+        next_layer = []
+        for state in layer:
+            for cell in cells_of(state.empty()):
+                child = state.copy()
+                child.play(cell)
+                key, _ = canonical_key(child)
+                if key in seen or child.winner() is not None or not child.empty():
+                    continue
+                seen.add(key)
+                next_layer.append(child)
+        positions.extend(next_layer)
+        layer = next_layer
+    return positions
+
+
+def build_book(rules, plies, iterations):
+    """对每个局面用全新的搜索树深度搜索，返回 {归一化局面哈希: (落子, {格子: 访问次数})}
+
+    直接获胜或必须防守的局面不需要搜索，不写入开局库。
+    """
+    from mcts_ai import MCTS
+    from search_stats import STOP_BLOCK, STOP_WIN
+
+    cache = MoveCache(rules, capacity=float('inf'))
+    for state in book_positions(rules, plies):
+        ai = MCTS(iterations=iterations, timeout=float('inf'), rules=rules)
+        cell, reason = ai.choose_move(state, time.perf_counter())
+        if reason in (STOP_WIN, STOP_BLOCK):
+            continue
+        root, sym = ai.get_node(state)
+        distribution = {action: visits for action, (visits, _) in ai.root_statistics(root, sym).items()}
+        cache.store(state, cell, distribution)
+    return cache.entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线生成开局库")
+    parser.add_argument('--plies', type=int, default=4, help="收录从空棋盘开始多少步以内的局面")
+    parser.add_argument('--iterations', type=int, default=20000, help="每个局面的搜索迭代次数")
+    parser.add_argument('--output', default=BOOK_PATH)
+    parser.add_argument('--size', type=int, default=3, help="棋盘边长")
+    parser.add_argument('--win-length', type=int, default=3, help="连成几子获胜")
+    parser.add_argument('--max-pieces', type=int, default=6, help="场上最多棋子数，0 表示棋子不消失")
+    args = parser.parse_args()
+
+    rules = get_rules(args.size, args.win_length, args.max_pieces or None)
+    start_time = time.time()
+    entries = build_book(rules, args.plies, args.iterations)
+    MoveCache.write(args.output, rules, entries)
+    print(f"开局库已写入 {args.output}：{len(entries)} 个局面，用时 {time.time() - start_time:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
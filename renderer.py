@@ -0,0 +1,152 @@
+"""两个游戏界面共用的绘制层
+
+棋盘背景和网格、X/O 棋子、字体和文字都只渲染一次并缓存；每帧只重画发生
+变化的格子和信息栏，再用 pygame.display.update(rects) 只刷新这些区域。
+"""
+import math
+
+import pygame
+
+X_MARGIN = 0.19  # X 两条斜线距离格子边缘的距离（占格子边长的比例，3×3 时为 38 像素）
+
+
+class Renderer:
+    def __init__(self, screen, window_size, board_size, info_height, line_width, colors,
+                 font_name='simhei'):
+        self.screen = screen
+        self.window_size = window_size
+        self.board_size = board_size
+        self.info_height = info_height
+        self.line_width = line_width
+        self.colors = colors
+        self.font_name = font_name
+        self.cell_size = window_size // board_size
+
+        self.background = self._render_background()
+        self.sprites = {player: self._render_piece(player) for player in ('X', 'O')}
+        # 闪烁和淡入用的副本，每帧只修改其整体透明度，不再新建 Surface
+        self.alpha_sprites = {player: sprite.copy() for player, sprite in self.sprites.items()}
+        self.fonts = {}
+        self.texts = {}
+
+        self.cell_state = {}   # (row, col) -> 上次绘制的 (棋子, 透明度)
+        self.info_text = None  # 上次绘制的信息栏文字
+        self.dirty = []
+        self.invalidate()
+
+    def _render_background(self):
+        """背景和网格线（坐标相对棋盘区域左上角）"""
+        surface = pygame.Surface((self.window_size, self.window_size))
+        surface.fill(self.colors["BG"])
+        for i in range(1, self.board_size):
+            pygame.draw.line(surface, self.colors["LINE"],
+                             (i * self.cell_size, 0), (i * self.cell_size, self.window_size),
+                             self.line_width)
+            pygame.draw.line(surface, self.colors["LINE"],
+                             (0, i * self.cell_size), (self.window_size, i * self.cell_size),
+                             self.line_width)
+        return surface
+
+    def _render_piece(self, player):
+        size = self.cell_size
+        margin = round(size * X_MARGIN)
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        if player == 'X':
+            pygame.draw.line(surface, self.colors["X"], (margin, margin),
+                             (size - margin, size - margin), self.line_width + 7)
+            pygame.draw.line(surface, self.colors["X"], (margin, size - margin),
+                             (size - margin, margin), self.line_width + 7)
+        else:
+            pygame.draw.circle(surface, self.colors["O"], (size // 2, size // 2),
+                               size // 3, self.line_width)
+        return surface
+
+    def font(self, size):
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.SysFont(self.font_name, size)
+        return self.fonts[size]
+
+    def text(self, message, size, color):
+        """渲染并缓存文字"""
+        key = (message, size, color)
+        if key not in self.texts:
+            self.texts[key] = self.font(size).render(message, True, color)
+        return self.texts[key]
+
+    def cell_rect(self, row, col):
+        return pygame.Rect(col * self.cell_size, row * self.cell_size + self.info_height,
+                           self.cell_size, self.cell_size)
+
+    def invalidate(self):
+        """下一帧整屏重画（例如弹窗之后）"""
+        self.screen.blit(self.background, (0, self.info_height))
+        self.cell_state = {}
+        self.info_text = None
+        self.dirty = [self.screen.get_rect()]
+
+    def draw_cell(self, row, col, player=None, alpha=255):
+        """恢复格子背景并画上棋子，alpha 小于 255 时半透明"""
+        state = (player, alpha if player else None)
+        if self.cell_state.get((row, col)) == state:
+            return
+        self.cell_state[(row, col)] = state
+        rect = self.cell_rect(row, col)
+        self.screen.blit(self.background, rect,
+                         rect.move(0, -self.info_height))
+        if player:
+            if alpha >= 255:
+                self.screen.blit(self.sprites[player], rect)
+            else:
+                sprite = self.alpha_sprites[player]
+                sprite.set_alpha(alpha)
+                self.screen.blit(sprite, rect)
+        self.dirty.append(rect)
+
+    @staticmethod
+    def fade_alpha():
+        """闪烁棋子当前的透明度（正弦变化）"""
+        t = pygame.time.get_ticks() / 500
+        return int(((math.sin(t * 3) + 1) / 2) * 255)
+
+    def draw_board(self, board, fading_pieces=(), alphas=None):
+        """只重画与上一帧不同的格子；fading_pieces 中的棋子按正弦规律闪烁，
+        alphas 为 {(row, col): 透明度}，用于正在淡入的棋子"""
+        alpha = self.fade_alpha() if fading_pieces else 255
+        alphas = alphas or {}
+        for row in range(self.board_size):
+            for col in range(self.board_size):
+                player = board[row][col]
+                fading = player is not None and (row, col, player) in fading_pieces
+                self.draw_cell(row, col, player,
+                               alphas.get((row, col), alpha if fading else 255))
+
+    def draw_info(self, message):
+        if message == self.info_text:
+            return
+        self.info_text = message
+        info_rect = pygame.Rect(0, 0, self.window_size, self.info_height)
+        pygame.draw.rect(self.screen, self.colors["INFO_BG"], info_rect)
+        text = self.text(message, 36, self.colors["INFO_TEXT"])
+        self.screen.blit(text, text.get_rect(center=(self.window_size // 2, self.info_height // 2)))
+        self.dirty.append(info_rect)
+
+    def draw_popup(self, rect, message, scale, button_rect=None):
+        """在 rect 中画弹窗，scale 为当前缩放比例；button_rect 不为 None 时画确定按钮"""
+        pygame.draw.rect(self.screen, (255, 255, 255), rect, border_radius=15)
+        pygame.draw.rect(self.screen, (180, 180, 180), rect, 3, border_radius=15)
+        if scale > 0.7:
+            text = self.text(message, int(54 * scale), (0, 0, 0))
+            text_rect = text.get_rect(center=rect.center)
+            text_rect.y -= 15  # 向上移动 15 个单位
+            self.screen.blit(text, text_rect)
+        if button_rect is not None:
+            pygame.draw.rect(self.screen, (50, 150, 50), button_rect, border_radius=10)
+            self.screen.blit(self.text("确定", 32, (255, 255, 255)),
+                             (button_rect.x + 18, button_rect.y + 3))
+
+    def present(self):
+        """只刷新本帧画过的区域"""
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
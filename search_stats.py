@@ -0,0 +1,72 @@
+"""单步搜索的统计信息
+
+MCTS(profile=True) 时每次 make_move 结束后可从 ai.last_stats 读取：
+各阶段耗时、完成的迭代次数、新建节点数、树深度、模拟步数分布以及搜索结束的原因。
+可以用 write_jsonl() 追加到 JSON Lines 文件中。
+"""
+import json
+
+PHASES = ('selection', 'expansion', 'simulation', 'backpropagation')
+
+# 搜索结束的原因
+STOP_TABLE = 'table'            # 完美下法表命中
+STOP_CACHE = 'cache'            # 落子缓存或开局库命中
+STOP_WIN = 'win'                # 直接获胜
+STOP_BLOCK = 'block'            # 必须防守
+STOP_ITERATIONS = 'iterations'  # 达到迭代次数上限
+STOP_TIMEOUT = 'timeout'        # 达到时间上限
+STOP_PROVEN = 'proven'          # 根节点的胜负已得到证明
+STOP_DECIDED = 'decided'        # 领先的落子在剩余迭代内已不可能被超过
+STOP_FORCED = 'forced'          # 只有一步可走
+STOP_SETTLED = 'settled'        # 时间管理器分配的目标时间已到，且选择已经明朗
+STOP_CANCELLED = 'cancelled'    # 被 stop_event 中止
+STOP_PARALLEL = 'parallel'      # 并行搜索（各进程自行结束）
+
+
+class SearchStats:
+    def __init__(self):
+        self.phase_time = dict.fromkeys(PHASES, 0.0)  # 各阶段累计耗时（秒）
+        self.iterations = 0
+        self.nodes_allocated = 0
+        self.tree_size = 0
+        self.max_depth = 0
+        self.rollout_lengths = {}  # 模拟步数 -> 次数
+        self.stop_reason = None
+        self.elapsed = 0.0
+        self.move = None
+
+    def record_iteration(self, times, depth, rollout_steps):
+        """times 为本次迭代四个阶段的耗时，rollout_steps 为模拟步数（未模拟时为 None）"""
+        for phase, seconds in zip(PHASES, times):
+            self.phase_time[phase] += seconds
+        self.iterations += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if rollout_steps is not None:
+            self.rollout_lengths[rollout_steps] = self.rollout_lengths.get(rollout_steps, 0) + 1
+
+    def to_dict(self):
+        return {
+            'move': self.move,
+            'elapsed': self.elapsed,
+            'stop_reason': self.stop_reason,
+            'iterations': self.iterations,
+            'nodes_allocated': self.nodes_allocated,
+            'tree_size': self.tree_size,
+            'max_depth': self.max_depth,
+            'phase_time': self.phase_time,
+            'rollout_lengths': {str(k): v for k, v in sorted(self.rollout_lengths.items())},
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def write_jsonl(self, path):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(self.to_json() + '\n')
+
+    def summary(self):
+        phases = '  '.join(f"{p} {self.phase_time[p] * 1000:.1f}ms" for p in PHASES)
+        return (f"落子 {self.move}：{self.elapsed * 1000:.1f}ms，结束原因 {self.stop_reason}，"
+                f"{self.iterations} 次迭代，新建 {self.nodes_allocated} 个节点，"
+                f"最大深度 {self.max_depth}\n  {phases}")
@@ -0,0 +1,218 @@
+"""棋子消失变体的完全解：逆向（retrograde）分析 + 磁盘上的完美下法表
+
+场上最多 6 枚棋子，因此局面就是一个长度不超过 6 的有序落子序列（满 6 子时
+还需要记录轮到谁走），总共约 14 万个局面，可以全部枚举。
+
+对每个局面标注 行棋方 胜 / 负 / 和 以及到达结果的步数，写成紧凑的二进制表：
+    文件头 MAGIC + 每个局面一个小端 uint16：高 2 位为结果，低 14 位为步数
+MCTS 通过 mmap 读取该表，落子只需查表。
+
+生成表：
+    python solver.py [输出路径]
+"""
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+from itertools import permutations
+
+from game_rules import CELLS, IS_WIN, MAX_PIECES
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perfect_play.bin')
+MAGIC = b'TTTV1\0\0\0'
+
+UNKNOWN, WIN, LOSS, DRAW = 0, 1, 2, 3  # 以行棋方视角
+RESULT_NAMES = {WIN: '胜', LOSS: '负', DRAW: '和'}
+DIST_MASK = (1 << 14) - 1
+
+
+def _falling(n, k):
+    result = 1
+    for i in range(k):
+        result *= n - i
+    return result
+
+
+# 长度为 k 的落子序列在表中的起始位置；满 6 子时每个序列占两项（轮到 X / 轮到 O）
+OFFSETS = []
+_total = 0
+for _k in range(MAX_PIECES + 1):
+    OFFSETS.append(_total)
+    _total += _falling(CELLS, _k) * (2 if _k == MAX_PIECES else 1)
+TABLE_SIZE = _total
+
+
+def state_index(cells, to_move):
+    """有序落子序列 + 行棋方 -> 表中下标（序列按字典序排名）"""
+    k = len(cells)
+    used = 0
+    rank = 0
+    for i, cell in enumerate(cells):
+        smaller = cell - bin(used & ((1 << cell) - 1)).count('1')
+        rank += smaller * _falling(CELLS - i - 1, k - i - 1)
+        used |= 1 << cell
+    if k == MAX_PIECES:
+        return OFFSETS[k] + rank * 2 + to_move
+    return OFFSETS[k] + rank
+
+
+def _owner_masks(cells, to_move):
+    """按轮流落子推算出 X、O 的占位掩码"""
+    # 最新的一枚属于刚走完的一方，往前依次交替
+    masks = [0, 0]
+    player = to_move ^ 1
+    for cell in reversed(cells):
+        masks[player] |= 1 << cell
+        player ^= 1
+    return masks
+
+
+def _successor(cells, cell):
+    new = cells + (cell,)
+    if len(new) > MAX_PIECES:
+        new = new[1:]
+    return new
+
+
+def _states():
+    """按表中下标顺序枚举所有 (落子序列, 行棋方)"""
+    for k in range(MAX_PIECES + 1):
+        for cells in permutations(range(CELLS), k):
+            if k == MAX_PIECES:
+                yield cells, 0
+                yield cells, 1
+            else:
+                yield cells, k % 2
+
+
+def solve():
+    """逆向分析，返回 (结果数组, 步数数组)"""
+    results = array('B', bytes(TABLE_SIZE))
+    dist = array('H', bytes(2 * TABLE_SIZE))
+    remaining = array('B', bytes(TABLE_SIZE))
+    parents = [None] * TABLE_SIZE
+    queue = deque()
+
+    for index, (cells, to_move) in enumerate(_states()):
+        masks = _owner_masks(cells, to_move)
+        if IS_WIN[masks[to_move ^ 1]]:
+            # 上一手已连成一线：行棋方输，对局结束
+            results[index] = LOSS
+            queue.append(index)
+            continue
+        occupied = masks[0] | masks[1]
+        moves = 0
+        for cell in range(CELLS):
+            if not occupied >> cell & 1:
+                child = state_index(_successor(cells, cell), to_move ^ 1)
+                if parents[child] is None:
+                    parents[child] = [index]
+                else:
+                    parents[child].append(index)
+                moves += 1
+        remaining[index] = moves
+
+    while queue:
+        index = queue.popleft()
+        preds = parents[index]
+        if preds is None:
+            continue
+        d = dist[index] + 1
+        if results[index] == LOSS:
+            for p in preds:
+                if results[p] == UNKNOWN:
+                    results[p] = WIN
+                    dist[p] = d
+                    queue.append(p)
+        else:
+            for p in preds:
+                if results[p] == UNKNOWN:
+                    remaining[p] -= 1
+                    if remaining[p] == 0:
+                        results[p] = LOSS
+                        dist[p] = d
+                        queue.append(p)
+
+    # 无法被证明胜负的局面可以无限循环下去，判为和棋
+    for index in range(TABLE_SIZE):
+        if results[index] == UNKNOWN:
+            results[index] = DRAW
+    return results, dist
+
+
+def write_table(path=TABLE_PATH):
+    results, dist = solve()
+    packed = array('H', (r << 14 | d for r, d in zip(results, dist)))
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        packed.tofile(f)
+    return results, dist
+
+
+class PerfectPlayTable:
+    """以 mmap 方式读取 write_table 生成的完美下法表"""
+
+    def __init__(self, path=TABLE_PATH):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC or len(self._mm) != len(MAGIC) + 2 * TABLE_SIZE:
+            self._mm.close()
+            raise ValueError(f"{path} 不是有效的完美下法表")
+
+    def close(self):
+        self._mm.close()
+
+    def _entry(self, cells, to_move):
+        value, = struct.unpack_from('<H', self._mm, len(MAGIC) + 2 * state_index(cells, to_move))
+        return value >> 14, value & DIST_MASK
+
+    def lookup(self, state):
+        """返回 (结果, 步数)，以行棋方视角；不是正常对局能到达的局面则返回 None"""
+        cells = tuple(state.pieces())
+        if len(cells) < MAX_PIECES and state.to_move != len(cells) % 2:
+            return None
+        masks = _owner_masks(cells, state.to_move)
+        if masks[0] != state.x or masks[1] != state.o:
+            return None
+        return self._entry(cells, state.to_move)
+
+    def best_move(self, state):
+        """按完美下法选择落子：能赢取最快的赢法，否则取和，必输时尽量拖延"""
+        if self.lookup(state) is None:
+            return None
+        cells = tuple(state.pieces())
+        best_key = None
+        best_moves = []
+        for cell in range(CELLS):
+            if (state.x | state.o) >> cell & 1:
+                continue
+            result, d = self._entry(_successor(cells, cell), state.to_move ^ 1)
+            # 子局面的结果以对手视角记录
+            if result == LOSS:
+                key = (0, d)
+            elif result == DRAW:
+                key = (1, 0)
+            else:
+                key = (2, -d)
+            if best_key is None or key < best_key:
+                best_key = key
+                best_moves = [cell]
+            elif key == best_key:
+                best_moves.append(cell)
+        return random.choice(best_moves) if best_moves else None
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else TABLE_PATH
+    start_time = time.time()
+    results, dist = write_table(path)
+    counts = {r: results.count(r) for r in (WIN, LOSS, DRAW)}
+    print(f"共 {TABLE_SIZE} 个局面，用时 {time.time() - start_time:.1f} 秒，已写入 {path}")
+    print('  '.join(f"{RESULT_NAMES[r]}: {n}" for r, n in counts.items()))
+    print(f"初始局面（X 先行）：{RESULT_NAMES[results[0]]}")
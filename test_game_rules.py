@@ -0,0 +1,136 @@
+"""game_rules 的位棋盘状态与参考实现（列表形式的棋盘和落子记录）对照
+
+    python -m pytest -q
+"""
+import random
+
+import pytest
+
+from game_rules import (DEFAULT_RULES, PLAYERS, BitState, get_rules, threat_cells,
+                        winning_cells)
+
+# 默认规则、奇数棋子上限、4×4 棋盘、棋子不消失
+RULES = [DEFAULT_RULES, get_rules(3, 3, 7), get_rules(4, 3, 5), get_rules(3, 3, None)]
+GAMES = 50
+MOVES = 40
+
+
+def reference_move(board, pieces, player, cell, rules):
+    """原列表实现的落子语义：落子追加到记录末尾，超过上限时最早的棋子消失"""
+    row, col = divmod(cell, rules.size)
+    board = [r[:] for r in board]
+    pieces = pieces + [(row, col, PLAYERS[player])]
+    board[row][col] = PLAYERS[player]
+    if len(pieces) > rules.max_pieces:
+        removed = pieces.pop(0)
+        board[removed[0]][removed[1]] = None
+    return board, pieces
+
+
+def snapshot(state):
+    return state.x, state.o, state.pieces(), state.count, state.to_move
+
+
+def random_games(rules, seed):
+    """生成 GAMES 局随机对局的落子序列（棋子不消失时下满即止）"""
+    rng = random.Random(seed)
+    for _ in range(GAMES):
+        state = BitState(rules)
+        moves = []
+        while len(moves) < MOVES and state.empty():
+            moves.append(rng.choice(rules.cell_list[state.empty()]))
+            state.play(moves[-1])
+        yield moves
+
+
+@pytest.mark.parametrize('rules', RULES, ids=repr)
+def test_apply_matches_reference(rules):
+    for moves in random_games(rules, 1):
+        state = BitState(rules)
+        board = [[None] * rules.size for _ in range(rules.size)]
+        pieces = []
+        player = 0  # 参考实现中显式交替的行棋方
+        for cell in moves:
+            board, pieces = reference_move(board, pieces, player, cell, rules)
+            player ^= 1
+            state.apply(cell)
+            assert state.to_game_state() == (board, pieces)
+            assert state.to_move == player
+            assert state.count == len(pieces)
+            expected = BitState.from_game_state((board, pieces), rules)
+            assert (state.x, state.o, state.pieces()) == (expected.x, expected.o, expected.pieces())
+
+
+@pytest.mark.parametrize('rules', RULES, ids=repr)
+def test_undo_restores_state(rules):
+    for moves in random_games(rules, 2):
+        state = BitState(rules)
+        snapshots = []
+        for cell in moves:
+            snapshots.append(snapshot(state))
+            state.apply(cell)
+        while state.history:
+            state.undo()
+            assert snapshot(state) == snapshots.pop()
+
+
+@pytest.mark.parametrize('rules', RULES, ids=repr)
+def test_play_matches_apply(rules):
+    for moves in random_games(rules, 3):
+        played = BitState(rules)
+        applied = BitState(rules)
+        for cell in moves:
+            played.play(cell)
+            applied.apply(cell)
+            assert snapshot(played) == snapshot(applied)
+
+
+def reference_winning_cells(state, player):
+    """逐个空位试下：player 为对方时，行棋方先在另一个空位落一子"""
+    empty = state.rules.cell_list[state.empty()]
+    cells = 0
+    for cell in empty:
+        for first in ([None] if player == state.to_move else [c for c in empty if c != cell]):
+            trial = state.copy()
+            if first is not None:
+                trial.play(first)
+            trial.play(cell)
+            if trial.winner() == player:
+                cells |= 1 << cell
+                break
+    return cells
+
+
+@pytest.mark.parametrize('rules', RULES, ids=repr)
+def test_winning_cells_matches_trial_moves(rules):
+    for moves in random_games(rules, 4):
+        state = BitState(rules)
+        for cell in moves:
+            state.play(cell)
+            if state.winner() is not None:
+                break
+            if rules.popcount[state.empty()] < 2:
+                continue
+            for player in (0, 1):
+                assert winning_cells(state, player) == reference_winning_cells(state, player)
+
+
+def reference_threat_cells(state, player):
+    """逐条连线检查：线上只有一枚 player 的棋子、其余为空时，线上的空位都算"""
+    own = state.mask(player)
+    empty = state.empty()
+    cells = 0
+    for w in state.rules.win_masks:
+        if state.rules.popcount[own & w] == 1 and own & w | empty & w == w:
+            cells |= empty & w
+    return cells
+
+
+@pytest.mark.parametrize('rules', RULES, ids=repr)
+def test_threat_cells_matches_lines(rules):
+    for moves in random_games(rules, 5):
+        state = BitState(rules)
+        for cell in moves:
+            state.play(cell)
+            for player in (0, 1):
+                assert threat_cells(state, player) == reference_threat_cells(state, player)
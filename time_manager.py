@@ -0,0 +1,67 @@
+"""按对局阶段和局面复杂度分配每步的思考时间
+
+MCTS(time_budget=...) 时使用：整局（或整个会话）共用一份时间预算，每步开始前
+allocate() 给出 (目标时间, 上限时间)：
+- 基础份额为 每局预算 / MOVES_TO_GO；会话预算不知道还要下几局，按剩余预算计算，
+  剩余越少每步越快
+- 开局阶段（棋子数少于连线长度，谁都还不可能连成一线）的选择最容易出错，份额乘
+  OPENING_FACTOR；之后双方都没有潜在威胁（某条线上只有一枚棋子、其余为空）的
+  平静局面也比有威胁的局面难判断，份额乘 QUIET_FACTOR
+- 上限时间 = 目标时间 × LIMIT_FACTOR，且不超过剩余预算的 MAX_SHARE
+对手下一手就能连成一线的局面由 MCTS 直接防守，不经过搜索，所以这里只看潜在威胁。
+搜索到目标时间后，若根节点访问次数分布的归一化熵低于 SETTLED_ENTROPY（选择
+已经明朗）就结束，否则继续搜索直到上限时间。每步实际用时由 spend() 从预算中扣除。
+
+各项系数按 3×3 棋子消失规则下与完美对局表对照的失误率选取：开局和访问分布
+分散的局面多给时间能明显减少失误，棋子即将消失的局面并不比其他局面更容易出错。
+"""
+import math
+
+from game_rules import threat_cells
+
+MOVES_TO_GO = 20         # 预算按这么多步平分作为基础份额
+OPENING_FACTOR = 3.0     # 开局阶段的份额倍数
+QUIET_FACTOR = 2.0       # 双方都没有潜在威胁时的份额倍数
+LIMIT_FACTOR = 3.0       # 上限时间 = 目标时间 × LIMIT_FACTOR
+MAX_SHARE = 0.25         # 单步上限时间不超过剩余预算的这个比例
+MIN_MOVE_TIME = 0.01     # 每步至少分到的时间（秒）
+SETTLED_ENTROPY = 0.6    # 根节点访问分布的归一化熵低于该值视为选择已明朗
+
+
+class TimeManager:
+    def __init__(self, budget, per_game=True):
+        self.budget = budget        # 每局（per_game 为 True）或整个会话的总时间（秒）
+        self.per_game = per_game
+        self.remaining = budget
+
+    def new_game(self):
+        if self.per_game:
+            self.remaining = self.budget
+
+    def spend(self, seconds):
+        self.remaining = max(self.remaining - seconds, 0.0)
+
+    def complexity(self, state):
+        """按棋子数和潜在威胁给出的份额倍数"""
+        rules = state.rules
+        if state.count < rules.win_length:
+            return OPENING_FACTOR
+        if not threat_cells(state, 0) | threat_cells(state, 1):
+            return QUIET_FACTOR
+        return 1.0
+
+    def allocate(self, state):
+        """返回本步的 (目标时间, 上限时间)（秒）"""
+        share = (self.budget if self.per_game else self.remaining) / MOVES_TO_GO
+        target = share * self.complexity(state)
+        limit = max(min(target * LIMIT_FACTOR, self.remaining * MAX_SHARE), MIN_MOVE_TIME)
+        return min(max(target, MIN_MOVE_TIME), limit), limit
+
+    @staticmethod
+    def settled(visits):
+        """visits 为根节点各候选落子的访问次数；分布足够集中时返回 True"""
+        total = sum(visits)
+        if len(visits) < 2 or total == 0:
+            return True
+        entropy = -sum(n / total * math.log(n / total) for n in visits if n)
+        return entropy / math.log(len(visits)) < SETTLED_ENTROPY